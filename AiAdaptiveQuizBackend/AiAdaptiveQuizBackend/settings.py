@@ -77,6 +77,19 @@ DATABASES = {
     }
 }
 
+# Caches
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Read-through cache of Q-tables stored in the database
+    'qtable': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'qtable',
+        'TIMEOUT': config('QTABLE_CACHE_TIMEOUT', default=30, cast=int),
+    },
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -110,6 +123,34 @@ AUTH_PASSWORD_VALIDATORS = [
     }
 ]
 
+# Question bank: pre-generated questions kept per (video, difficulty)
+QUESTION_BANK_SIZE = config('QUESTION_BANK_SIZE', default=30, cast=int)
+
+# Transcript excerpt sent to Gemini: chunk size and total budget, in words
+TRANSCRIPT_CHUNK_WORDS = config('TRANSCRIPT_CHUNK_WORDS', default=150, cast=int)
+QUIZ_PROMPT_TRANSCRIPT_WORDS = config('QUIZ_PROMPT_TRANSCRIPT_WORDS', default=3000, cast=int)
+
+# Background quiz generation
+QUIZ_GENERATION_WORKERS = config('QUIZ_GENERATION_WORKERS', default=4, cast=int)
+QUIZ_GENERATION_JOB_TIMEOUT = config('QUIZ_GENERATION_JOB_TIMEOUT', default=300, cast=int)
+QUIZ_BATCH_MAX_VARIANTS = config('QUIZ_BATCH_MAX_VARIANTS', default=3, cast=int)  # quizzes per difficulty in one LLM call
+
+# Whisper transcription
+WHISPER_MODEL = config('WHISPER_MODEL', default='base')
+WHISPER_THREADS = config('WHISPER_THREADS', default=0, cast=int)  # 0 keeps torch's default
+TRANSCRIPTION_WORKERS = config('TRANSCRIPTION_WORKERS', default=2, cast=int)
+# Off by default: every web process that autostarts runs its own Whisper pool. Run
+# `manage.py run_transcription_worker` once instead, or enable this for a single-process server.
+TRANSCRIPTION_WORKER_AUTOSTART = config('TRANSCRIPTION_WORKER_AUTOSTART', default=False, cast=bool)
+TRANSCRIPTION_MAX_ATTEMPTS = config('TRANSCRIPTION_MAX_ATTEMPTS', default=5, cast=int)
+TRANSCRIPTION_RETRY_BACKOFF = config('TRANSCRIPTION_RETRY_BACKOFF', default=60, cast=int)
+TRANSCRIPTION_JOB_TIMEOUT = config('TRANSCRIPTION_JOB_TIMEOUT', default=3600, cast=int)
+TRANSCRIPTION_SEGMENT_SECONDS = config('TRANSCRIPTION_SEGMENT_SECONDS', default=600, cast=int)
+AUDIO_CACHE_DIR = config('AUDIO_CACHE_DIR', default=str(BASE_DIR / 'audio_cache'))
+AUDIO_CACHE_MAX_BYTES = config('AUDIO_CACHE_MAX_BYTES', default=5 * 1024 ** 3, cast=int)
+AUDIO_CACHE_GRACE_SECONDS = config('AUDIO_CACHE_GRACE_SECONDS', default=3600, cast=int)  # never evict files used this recently
+TRANSCRIPTION_WORK_DIR = config('TRANSCRIPTION_WORK_DIR', default=str(BASE_DIR / 'transcription_work'))
+
 # Site settings
 SITE_NAME = 'AdaptiveLearn AI'
 SITE_VERSION = 'v1.0.0'
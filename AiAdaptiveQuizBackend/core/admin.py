@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Category, Course, Video, QuizSession, Question
+from .models import Category, Course, Video, QuizSession, Question, BankQuestion, QuizGenerationJob, QTableEntry, TranscriptionJob
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -39,3 +39,26 @@ class QuestionAdmin(admin.ModelAdmin):
     list_display = ['text', 'options', 'correct_answer', 'difficulty']
     readonly_fields = ['created_at', 'updated_at']
 
+@admin.register(BankQuestion)
+class BankQuestionAdmin(admin.ModelAdmin):
+    list_display = ['text', 'video', 'difficulty']
+    list_filter = ['difficulty']
+    readonly_fields = ['created_at', 'updated_at']
+
+@admin.register(QuizGenerationJob)
+class QuizGenerationJobAdmin(admin.ModelAdmin):
+    list_display = ['session', 'status', 'difficulty', 'created_at']
+    list_filter = ['status']
+    readonly_fields = ['created_at', 'updated_at']
+
+@admin.register(QTableEntry)
+class QTableEntryAdmin(admin.ModelAdmin):
+    list_display = ['key', 'state', 'action', 'q_value', 'updated_at']
+    search_fields = ['key']
+    readonly_fields = ['updated_at']
+
+@admin.register(TranscriptionJob)
+class TranscriptionJobAdmin(admin.ModelAdmin):
+    list_display = ['video', 'status', 'attempts', 'next_attempt_at']
+    list_filter = ['status']
+    readonly_fields = ['created_at', 'updated_at']
@@ -0,0 +1,84 @@
+from django.db.models import Avg, Count, Q, Sum
+from .models import QuizSession
+
+MAX_ACTIVITIES = 5
+
+
+def get_user_stats(user):
+    """Total stars, submitted quiz count and average score of a user in a single query."""
+    submitted = Q(is_quiz_submitted=True)
+    stats = QuizSession.objects.filter(user=user).aggregate(
+        total_stars=Sum("stars", filter=Q(stars__gt=0)),
+        quizzes_completed=Count("id", filter=submitted),
+        average_score=Avg("score", filter=submitted),
+    )
+    return stats
+
+
+def get_recent_sessions(user):
+    """All quiz sessions of a user, most recently updated first, with video and course joined in."""
+    return list(
+        QuizSession.objects.filter(user=user)
+        .select_related("video__course")
+        .order_by("-updated_at")
+    )
+
+
+def get_recent_course_ids(sessions):
+    """Distinct course ids in the order the user last touched them."""
+    course_ids = []
+    for session in sessions:
+        if session.video.course_id not in course_ids:
+            course_ids.append(session.video.course_id)
+    return course_ids
+
+
+def build_activities(sessions, completed_course_ids, max_activities=MAX_ACTIVITIES):
+    """Build the dashboard activity feed from already fetched sessions."""
+    submitted_by_course = {}
+    for session in sessions:
+        if session.completed_at is not None and session.is_quiz_submitted:
+            submitted_by_course.setdefault(session.video.course_id, []).append(session)
+
+    activities = []
+    activity_id = 1
+    seen_course_ids = set()
+    for session in sessions:
+        course = session.video.course
+        if course.id in seen_course_ids:
+            continue
+        seen_course_ids.add(course.id)
+        if len(activities) >= max_activities:
+            break
+        course_sessions = submitted_by_course.get(course.id, [])
+        if course.id in completed_course_ids:
+            activities.append({
+                "id": activity_id,
+                "type": "course_completed",
+                "title": course.title,
+                "description": "Completed course",
+                "date": max(s.updated_at for s in course_sessions) if course_sessions else None
+            })
+            activity_id += 1
+        for quiz_session in sorted(course_sessions, key=lambda s: s.completed_at, reverse=True):
+            if len(activities) >= max_activities:
+                break
+            title = quiz_session.video.title + " - " + course.title
+            if quiz_session.stars > 0:
+                activities.append({
+                    "id": activity_id,
+                    "type": "reward_received",
+                    "title": title,
+                    "description": "Received reward",
+                    "date": quiz_session.updated_at
+                })
+                activity_id += 1
+            activities.append({
+                "id": activity_id,
+                "type": "quiz_completed",
+                "title": title,
+                "description": "Completed quiz",
+                "date": quiz_session.completed_at
+            })
+            activity_id += 1
+    return activities
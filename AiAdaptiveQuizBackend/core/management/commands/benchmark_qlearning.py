@@ -0,0 +1,60 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from core.models import QTableEntry
+from core.qlearning.qtable import QLearningAgent, ACTIONS, get_state
+
+class Command(BaseCommand):
+    help = "Compare the per-step Q-learning loop with QLearningAgent.update_episode"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--episodes", type=int, default=50, help="Quizzes to replay per method")
+        parser.add_argument("--questions", type=int, default=10, help="Answers per quiz")
+
+    def per_step(self, agent, key, steps):
+        # The two-pass loop SubmitQuizView ran before update_episode
+        states_and_actions = []
+        current_state = get_state(agent.avg_level(key))
+        for action, reward in steps:
+            states_and_actions.append((current_state, action, reward))
+            agent.update(key, current_state, action, reward, current_state)
+            current_state = get_state(agent.avg_level(key))
+        for state, action, reward in states_and_actions:
+            agent.update(key, state, action, reward, current_state)
+
+    def run(self, label, method, episodes):
+        agent = QLearningAgent()
+        key = f"benchmark_{label}"
+        QTableEntry.objects.filter(key=key).delete()
+        agent.invalidate(key)
+        random.seed(0)
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            for steps in episodes:
+                method(agent, key, steps)
+        elapsed = time.perf_counter() - start
+        table = agent.export_qtable(key)
+        QTableEntry.objects.filter(key=key).delete()
+        agent.invalidate(key)
+        self.stdout.write(
+            f"{label:>14}: {elapsed * 1000 / len(episodes):8.2f} ms/quiz, "
+            f"{len(queries.captured_queries) / len(episodes):6.1f} queries/quiz"
+        )
+        return table
+
+    def handle(self, *args, **options):
+        rng = random.Random(42)
+        episodes = [
+            [(rng.choice(ACTIONS), rng.choice([1, -1])) for _ in range(options["questions"])]
+            for _ in range(options["episodes"])
+        ]
+        per_step = self.run("per-step", self.per_step, episodes)
+        episode = self.run("update_episode", lambda agent, key, steps: agent.update_episode(key, steps), episodes)
+        drift = max(
+            (abs(a["q_value"] - b["q_value"]) for a, b in zip(per_step, episode)),
+            default=0.0,
+        )
+        same_entries = [(r["state"], r["action"]) for r in per_step] == [(r["state"], r["action"]) for r in episode]
+        self.stdout.write(f"Same Q-table entries: {same_entries}, max |dQ|: {drift:.2e}")
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from core.models import Video
+from core.question_bank import fill_question_bank
+
+class Command(BaseCommand):
+    help = "Pre-generate bank questions for every video with a transcript"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--size", type=int, default=None, help="Questions to keep per video and difficulty (default: QUESTION_BANK_SIZE)")
+        parser.add_argument("--video", type=int, action="append", help="Only fill the bank of this video id (repeatable)")
+
+    def handle(self, *args, **options):
+        videos = Video.objects.exclude(transcript__exact="").exclude(transcript__exact="Failed to generate transcript")
+        if options["video"]:
+            videos = videos.filter(id__in=options["video"])
+        self.stdout.write(f"Filling question bank for {videos.count()} videos.")
+        for video in videos:
+            try:
+                added = fill_question_bank(video, target=options["size"])
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"Failed for {video.title}: {e}"))
+                continue
+            summary = ", ".join(f"{count} {difficulty}" for difficulty, count in added.items())
+            self.stdout.write(self.style.SUCCESS(f"{video.title}: added {summary} questions"))
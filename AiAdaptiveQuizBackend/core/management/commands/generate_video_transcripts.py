@@ -1,16 +1,104 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.utils import timezone
 from core.models import Video
-from core.quiz_generator.whisper_transcript import generate_transcript_from_url
+from core.quiz_generator.whisper_transcript import download_audio_from_youtube, pin_audio, unpin_audio, TranscriptionPool
 
 class Command(BaseCommand):
     help = "Generate transcripts for existing videos without a transcript"
 
+    def add_arguments(self, parser):
+        parser.add_argument("--download-workers", type=int, default=4, help="Concurrent yt-dlp downloads")
+        parser.add_argument("--transcribe-workers", type=int, default=settings.TRANSCRIPTION_WORKERS, help="Whisper worker processes")
+        parser.add_argument("--limit", type=int, default=None, help="Process at most this many videos")
+        parser.add_argument("--batch-size", type=int, default=20, help="Transcripts saved per bulk update")
+        parser.add_argument("--max-pending", type=int, default=None, help="Audio files downloading or waiting for Whisper at once (default: download workers + 2 x transcribe workers)")
+
     def handle(self, *args, **options):
         videos = Video.objects.filter(transcript__exact="") | Video.objects.filter(transcript__exact="Failed to generate transcript")
-        self.stdout.write(f"Found {videos.count()} videos without transcripts.")
-        for video in videos:
-            self.stdout.write(f"Processing: {video.title} ({video.video_url})")
-            transcript = generate_transcript_from_url(video.video_url)
-            video.transcript = transcript
-            video.save()
-            self.stdout.write(self.style.SUCCESS(f"Transcript saved for: {video.title}")) 
\ No newline at end of file
+        videos = videos.order_by("id")
+        if options["limit"]:
+            videos = videos[:options["limit"]]
+        videos = list(videos)
+        self.stdout.write(f"Found {len(videos)} videos without transcripts.")
+        if not videos:
+            return
+
+        # Downloads (network bound) run in threads and feed the Whisper processes (CPU bound) as they
+        # finish. Both are handled in one loop, so transcripts are saved as they come in, and new
+        # downloads only start while fewer than max_pending files are downloading or queued.
+        max_pending = options["max_pending"] or options["download_workers"] + 2 * options["transcribe_workers"]
+        pool = TranscriptionPool(workers=options["transcribe_workers"])
+        remaining = iter(videos)
+        downloading = {}
+        transcribing = {}
+        pending = []
+        done = 0
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=options["download_workers"]) as downloads:
+                while True:
+                    while len(downloading) + len(transcribing) < max_pending:
+                        video = next(remaining, None)
+                        if video is None:
+                            break
+                        downloading[downloads.submit(download_audio_from_youtube, video.video_url)] = video
+                    if not downloading and not transcribing:
+                        break
+
+                    finished, _ = wait([*downloading, *transcribing], return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        if future in downloading:
+                            video = downloading.pop(future)
+                            try:
+                                audio_path = future.result()
+                            except Exception as e:
+                                self.stdout.write(self.style.ERROR(f"Download failed for {video.title}: {e}"))
+                                audio_path = None
+                            if not audio_path:
+                                done += 1
+                                continue
+                            self.stdout.write(f"Downloaded: {video.title} ({video.video_url})")
+                            # Queued files are the least recently used, so keep later downloads from evicting them
+                            pin_audio(audio_path)
+                            transcribing[pool.submit(audio_path)] = (video, audio_path)
+                            continue
+
+                        video, audio_path = transcribing.pop(future)
+                        unpin_audio(audio_path)
+                        try:
+                            video.set_transcript(future.result()["text"])
+                        except Exception as e:
+                            self.stdout.write(self.style.ERROR(f"Transcription failed for {video.title}: {e}"))
+                            video.set_transcript("Failed to generate transcript")
+                        video.updated_at = timezone.now()
+                        pending.append(video)
+                        done += 1
+                        if len(pending) >= options["batch_size"]:
+                            self.save(pending)
+                            pending = []
+                        self.progress(done, len(videos), started, pool)
+        finally:
+            self.save(pending)
+            pool.shutdown()
+
+        stats = pool.stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Transcribed {stats['completed']} videos, {stats['audio_seconds']:.0f}s of audio "
+            f"in {time.perf_counter() - started:.0f}s ({stats['throughput']:.2f} audio-s per wall-s)."
+        ))
+
+    def save(self, videos):
+        if videos:
+            Video.objects.bulk_update(videos, ["transcript", "normalized_transcript", "transcript_digest", "updated_at"])
+            self.stdout.write(self.style.SUCCESS(f"Saved {len(videos)} transcripts."))
+
+    def progress(self, done, total, started, pool):
+        elapsed = time.perf_counter() - started
+        stats = pool.stats()
+        self.stdout.write(
+            f"[{done}/{total}] {done / elapsed * 60:.1f} videos/min, "
+            f"{stats['throughput']:.2f} audio-s per wall-s"
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from core.models import Video
+from core.transcription_jobs import enqueue_transcription, run_worker
+
+class Command(BaseCommand):
+    help = "Run the transcription job worker in the foreground"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Exit when no job is due instead of waiting for more")
+        parser.add_argument("--enqueue-missing", action="store_true", help="Queue every video that still has no transcript first")
+
+    def handle(self, *args, **options):
+        if options["enqueue_missing"]:
+            videos = Video.objects.filter(transcript__exact="") | Video.objects.filter(transcript__exact="Failed to generate transcript")
+            for video in videos.exclude(video_url=""):
+                # This command is the worker; don't start a second one in the background
+                enqueue_transcription(video, start_worker=False)
+            self.stdout.write(f"Queued {videos.count()} videos.")
+        self.stdout.write("Transcription worker started.")
+        run_worker(stop_when_idle=options["once"])
+        self.stdout.write(self.style.SUCCESS("Transcription worker stopped."))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_quizsession_is_quiz_generated_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BankQuestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('text', models.TextField(help_text='The text of the question')),
+                ('options', models.JSONField(help_text='The options of the question')),
+                ('correct_answer', models.CharField(help_text='The correct answer of the question', max_length=1)),
+                ('difficulty', models.CharField(help_text='The difficulty of the question', max_length=20)),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bank_questions', to='core.video')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['video', 'difficulty'], name='core_bankqu_video_i_8ee485_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_bankquestion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuizGenerationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', help_text='The status of the generation job', max_length=20)),
+                ('difficulty', models.CharField(help_text='The difficulty chosen by the Q-learning agent', max_length=20)),
+                ('state', models.CharField(blank=True, help_text='The Q-learning state the quiz is generated for', max_length=20)),
+                ('adaptation_level', models.FloatField(default=0.0)),
+                ('error', models.TextField(blank=True, help_text='The error message if the job failed')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='generation_jobs', to='core.quizsession')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_quizgenerationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QTableEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text="The Q-table key, e.g. '<user_id>_<course_id>'", max_length=100)),
+                ('state', models.CharField(help_text='The learner state', max_length=20)),
+                ('action', models.CharField(help_text='The difficulty chosen in that state', max_length=20)),
+                ('q_value', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['key'], name='core_qtable_key_c13fcd_idx')],
+                'constraints': [models.UniqueConstraint(fields=('key', 'state', 'action'), name='unique_qtable_entry')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:47
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_qtableentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', help_text='The status of the transcription job', max_length=20)),
+                ('attempts', models.IntegerField(default=0, help_text='How many times the transcription has been tried')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, help_text='When the job may be picked up next')),
+                ('error', models.TextField(blank=True, help_text='The error of the last failed attempt')),
+                ('video', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='transcription_job', to='core.video')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='core_transc_status_b8bc98_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_transcriptionjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TranscriptChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.IntegerField(help_text='The position of the chunk in the transcript')),
+                ('text', models.TextField(help_text='The text of the chunk')),
+                ('word_count', models.IntegerField(default=0)),
+                ('keywords', models.JSONField(default=dict, help_text="TF-IDF weights of the chunk's top keywords")),
+                ('source_digest', models.CharField(help_text='Digest of the transcript the chunk was cut from', max_length=64)),
+                ('video', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transcript_chunks', to='core.video')),
+            ],
+            options={
+                'ordering': ['video', 'index'],
+                'constraints': [models.UniqueConstraint(fields=('video', 'index'), name='unique_transcript_chunk')],
+            },
+        ),
+    ]
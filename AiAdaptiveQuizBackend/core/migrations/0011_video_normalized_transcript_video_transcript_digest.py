@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:51
+
+import hashlib
+import re
+
+from django.db import migrations, models
+
+# Frozen copies of core.quiz_generator.normalization as of this migration, so later changes to
+# that module don't change what the migration writes
+FENCE_REGEX = re.compile(r"^```(?:json)?\s*\n?(.*?)\n?\s*```$", re.DOTALL)
+WHITESPACE_REGEX = re.compile(r"\s+")
+
+
+def normalize_transcript(transcript):
+    match = FENCE_REGEX.match(transcript)
+    if match and match[1]:
+        transcript = match[1].strip()
+    return WHITESPACE_REGEX.sub(" ", transcript)
+
+
+def transcript_digest(transcript):
+    return hashlib.sha256(transcript.encode("utf-8")).hexdigest()
+
+
+def normalize_existing_transcripts(apps, schema_editor):
+    Video = apps.get_model('core', 'Video')
+    videos = list(Video.objects.only('id', 'transcript'))
+    for video in videos:
+        video.normalized_transcript = normalize_transcript(video.transcript)
+        video.transcript_digest = transcript_digest(video.transcript)
+    Video.objects.bulk_update(videos, ['normalized_transcript', 'transcript_digest'], batch_size=100)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_transcriptchunk'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='normalized_transcript',
+            field=models.TextField(blank=True, editable=False, help_text='The transcript as sent to the LLM'),
+        ),
+        migrations.AddField(
+            model_name='video',
+            name='transcript_digest',
+            field=models.CharField(blank=True, editable=False, help_text='SHA-256 of the transcript', max_length=64),
+        ),
+        migrations.RunPython(normalize_existing_transcripts, migrations.RunPython.noop),
+    ]
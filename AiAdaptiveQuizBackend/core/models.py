@@ -1,5 +1,8 @@
 from django.db import models
+from django.db.models import BooleanField, Count, Exists, ExpressionWrapper, F, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -18,10 +21,43 @@ class Category(ActiveModel):
     def __str__(self):
         return self.name
 
+class CourseQuerySet(models.QuerySet):
+    def with_video_count(self):
+        """Annotate video_count without joining the videos."""
+        video_count = (
+            Video.objects.filter(course=OuterRef("pk"))
+            .order_by()
+            .values("course")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        return self.annotate(video_count=Coalesce(Subquery(video_count, output_field=IntegerField()), Value(0)))
+
+    def with_user_progress(self, user):
+        """Annotate video_count, completed_video_count, is_started and is_completed for a user in one query."""
+        completed_video_count = (
+            QuizSession.objects.filter(video__course=OuterRef("pk"), user=user, completed_at__isnull=False)
+            .order_by()
+            .values("video__course")
+            .annotate(count=Count("video", distinct=True))
+            .values("count")
+        )
+        return self.with_video_count().annotate(
+            completed_video_count=Coalesce(Subquery(completed_video_count, output_field=IntegerField()), Value(0)),
+            is_started=Exists(QuizSession.objects.filter(video__course=OuterRef("pk"), user=user)),
+        ).annotate(
+            is_completed=ExpressionWrapper(
+                Q(video_count__gt=0) & Q(completed_video_count=F("video_count")),
+                output_field=BooleanField(),
+            ),
+        )
+
 class Course(ActiveModel):
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name="courses")
     title = models.CharField(max_length=200, unique=True, help_text="The title of the course")
     description = models.TextField(help_text="The description of the course")
+
+    objects = CourseQuerySet.as_manager()
     
     @property
     def total_videos(self):
@@ -43,11 +79,24 @@ class Course(ActiveModel):
     def __str__(self):
         return self.title
 
+class VideoQuerySet(models.QuerySet):
+    def with_user_status(self, user):
+        """Annotate is_started and is_completed for a user so serializing videos costs no extra queries."""
+        sessions = QuizSession.objects.filter(video=OuterRef("pk"), user=user)
+        return self.annotate(
+            is_started=Exists(sessions),
+            is_completed=Exists(sessions.filter(completed_at__isnull=False)),
+        )
+
 class Video(ActiveModel):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="videos")
     title = models.CharField(max_length=200, unique=True, help_text="The title of the video")
     video_url = models.URLField(help_text="The url of the video")
     transcript = models.TextField(blank=True, help_text="The transcript of the video")
+    normalized_transcript = models.TextField(blank=True, editable=False, help_text="The transcript as sent to the LLM")
+    transcript_digest = models.CharField(max_length=64, blank=True, editable=False, help_text="SHA-256 of the transcript")
+
+    objects = VideoQuerySet.as_manager()
 
     @property
     def is_transcript_generated(self):
@@ -59,22 +108,32 @@ class Video(ActiveModel):
     def is_video_completed_by_user(self, user):
         return self.is_video_started_by_user(user) and QuizSession.objects.filter(video=self, user=user, completed_at__isnull=False).exists()
     
+    @staticmethod
+    def transcript_fields(transcript):
+        """Field values to store with a transcript, for queryset updates that bypass save()."""
+        from core.quiz_generator.normalization import normalize_transcript, transcript_digest
+        return {
+            "transcript": transcript,
+            "normalized_transcript": normalize_transcript(transcript),
+            "transcript_digest": transcript_digest(transcript),
+        }
+
+    def set_transcript(self, transcript):
+        for field, value in self.transcript_fields(transcript).items():
+            setattr(self, field, value)
+
     def save(self, *args, **kwargs):
-        if not self.is_transcript_generated and self.video_url:
-            from core.quiz_generator.whisper_transcript import generate_transcript_from_url
-            import threading
-            
-            def generate_transcript_async():
-                transcript = generate_transcript_from_url(self.video_url)
-                if transcript:
-                    self.transcript = transcript
-                    self.save(update_fields=['transcript'])
-            
-            thread = threading.Thread(target=generate_transcript_async)
-            thread.daemon = True
-            thread.start()
-            
+        from core.quiz_generator.normalization import transcript_digest
+        # Normalize once here rather than on every quiz request
+        if transcript_digest(self.transcript) != self.transcript_digest:
+            self.set_transcript(self.transcript)
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "transcript" in update_fields:
+                kwargs["update_fields"] = {*update_fields, "normalized_transcript", "transcript_digest"}
         super().save(*args, **kwargs)
+        if not self.is_transcript_generated and self.video_url:
+            from core.transcription_jobs import enqueue_transcription
+            enqueue_transcription(self)
 
     def __str__(self):
         return self.title
@@ -104,4 +163,94 @@ class Question(ActiveModel):
 
     @property
     def is_correct(self):
-        return self.selected == self.correct_answer
\ No newline at end of file
+        return self.selected == self.correct_answer
+
+class BankQuestion(ActiveModel):
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name="bank_questions")
+    text = models.TextField(help_text="The text of the question")
+    options = models.JSONField(help_text="The options of the question")
+    correct_answer = models.CharField(max_length=1, help_text="The correct answer of the question")
+    difficulty = models.CharField(max_length=20, help_text="The difficulty of the question")
+
+    class Meta:
+        indexes = [models.Index(fields=["video", "difficulty"])]
+
+    def __str__(self):
+        return self.text
+
+class QuizGenerationJob(ActiveModel):
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_COMPLETED = "completed"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_COMPLETED, "Completed"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    session = models.ForeignKey(QuizSession, on_delete=models.CASCADE, related_name="generation_jobs")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, help_text="The status of the generation job")
+    difficulty = models.CharField(max_length=20, help_text="The difficulty chosen by the Q-learning agent")
+    state = models.CharField(max_length=20, blank=True, help_text="The Q-learning state the quiz is generated for")
+    adaptation_level = models.FloatField(default=0.0)
+    error = models.TextField(blank=True, help_text="The error message if the job failed")
+
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_COMPLETED, self.STATUS_FAILED)
+
+class QTableEntry(models.Model):
+    key = models.CharField(max_length=100, help_text="The Q-table key, e.g. '<user_id>_<course_id>'")
+    state = models.CharField(max_length=20, help_text="The learner state")
+    action = models.CharField(max_length=20, help_text="The difficulty chosen in that state")
+    q_value = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["key", "state", "action"], name="unique_qtable_entry"),
+        ]
+        indexes = [models.Index(fields=["key"])]
+
+    def __str__(self):
+        return f"{self.key} [{self.state}, {self.action}] = {self.q_value}"
+
+class TranscriptionJob(ActiveModel):
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_COMPLETED = "completed"
+    STATUS_FAILED = "failed"
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_RUNNING, "Running"),
+        (STATUS_COMPLETED, "Completed"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    video = models.OneToOneField(Video, on_delete=models.CASCADE, related_name="transcription_job")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, help_text="The status of the transcription job")
+    attempts = models.IntegerField(default=0, help_text="How many times the transcription has been tried")
+    next_attempt_at = models.DateTimeField(default=timezone.now, help_text="When the job may be picked up next")
+    error = models.TextField(blank=True, help_text="The error of the last failed attempt")
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return f"{self.video} ({self.status})"
+
+class TranscriptChunk(models.Model):
+    video = models.ForeignKey(Video, on_delete=models.CASCADE, related_name="transcript_chunks")
+    index = models.IntegerField(help_text="The position of the chunk in the transcript")
+    text = models.TextField(help_text="The text of the chunk")
+    word_count = models.IntegerField(default=0)
+    keywords = models.JSONField(default=dict, help_text="TF-IDF weights of the chunk's top keywords")
+    source_digest = models.CharField(max_length=64, help_text="Digest of the transcript the chunk was cut from")
+
+    class Meta:
+        ordering = ["video", "index"]
+        constraints = [
+            models.UniqueConstraint(fields=["video", "index"], name="unique_transcript_chunk"),
+        ]
@@ -0,0 +1,245 @@
+import numpy as np
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from core.models import QTableEntry
+
+ACTIONS = ["easy", "medium", "hard"]
+ACTION_INDEX = {action: i for i, action in enumerate(ACTIONS)}
+
+
+def make_key(user_id, course_id):
+    return f"{user_id}_{course_id}"
+
+
+def get_state(level):
+    """The learner state for an average Q-value: its first four characters, e.g. '0.12' or '-0.0'."""
+    return str(level)[:4]
+
+
+class QTable:
+    """Q-values of one key as a float32 (state x action) matrix.
+
+    `visited` marks the (state, action) pairs that have a stored row, so averages and exports only
+    cover what the learner actually did, the same as the row-per-entry storage. The matrices grow
+    by doubling; rows past the last state are unvisited zeros.
+    """
+
+    def __init__(self):
+        self.states = []
+        self.index = {}
+        self.values = np.zeros((0, len(ACTIONS)), dtype=np.float32)
+        self.visited = np.zeros((0, len(ACTIONS)), dtype=bool)
+        self._avg = None
+
+    @classmethod
+    def from_rows(cls, rows):
+        table = cls()
+        for state, action, q_value in rows:
+            if action in ACTION_INDEX:
+                table.set(state, action, q_value)
+        return table
+
+    def state_index(self, state, create=False):
+        i = self.index.get(state)
+        if i is None and create:
+            i = len(self.states)
+            self.states.append(state)
+            self.index[state] = i
+            if i == len(self.values):
+                self._grow(max(4, 2 * i))
+        return i
+
+    def _grow(self, capacity):
+        values = np.zeros((capacity, len(ACTIONS)), dtype=np.float32)
+        visited = np.zeros((capacity, len(ACTIONS)), dtype=bool)
+        values[:len(self.values)] = self.values
+        visited[:len(self.visited)] = self.visited
+        self.values, self.visited = values, visited
+
+    def get(self, state, action):
+        i = self.index.get(state)
+        return 0.0 if i is None else float(self.values[i, ACTION_INDEX[action]])
+
+    def set(self, state, action, q_value):
+        i = self.state_index(state, create=True)
+        self.values[i, ACTION_INDEX[action]] = q_value
+        self.visited[i, ACTION_INDEX[action]] = True
+        self._avg = None
+
+    def row(self, state):
+        """Q-values of a state, or None if the state was never visited."""
+        i = self.index.get(state)
+        if i is None or not self.visited[i].any():
+            return None
+        return self.values[i]
+
+    def max_q(self, state):
+        row = self.row(state)
+        return 0.0 if row is None else float(row.max())
+
+    def avg_level(self):
+        # Rounded to what float32 can represent so states derived from it (str(level)[:4]) stay stable
+        if self._avg is None:
+            self._avg = round(float(self.values[self.visited].mean()), 6) if self.visited.any() else 0.0
+        return self._avg
+
+    def export(self):
+        states, actions = np.nonzero(self.visited)
+        order = sorted(range(len(states)), key=lambda n: (self.states[states[n]], actions[n]))
+        return [
+            {"state": self.states[states[n]], "action": ACTIONS[actions[n]], "q_value": float(self.values[states[n], actions[n]])}
+            for n in order
+        ]
+
+    def __len__(self):
+        return int(self.visited.sum())
+
+
+class QLearningAgent:
+    """Q-learning agent that picks a quiz difficulty per learner and course.
+
+    Q-values live in the QTableEntry table, one row per (key, state, action), so every web worker
+    shares the same policy and an update only touches the rows it changes. Reads go through the
+    'qtable' cache as QTable matrices; this process invalidates a key on every write and entries
+    expire after QTABLE_CACHE_TIMEOUT seconds to pick up writes from other workers.
+    """
+
+    def __init__(self, alpha=0.1, gamma=0.9, epsilon=0.1):
+        self.alpha = alpha
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.cache = caches["qtable"]
+
+    def _cache_key(self, key):
+        return f"qtable:{key}"
+
+    def get_qtables(self, keys):
+        """Return {key: QTable} for many keys, loading every cache miss in a single query."""
+        keys = list(dict.fromkeys(keys))
+        cached = self.cache.get_many([self._cache_key(key) for key in keys])
+        tables = {key: cached[self._cache_key(key)] for key in keys if self._cache_key(key) in cached}
+        missing = [key for key in keys if key not in tables]
+        if missing:
+            rows = {key: [] for key in missing}
+            for key, state, action, q_value in QTableEntry.objects.filter(key__in=missing).values_list("key", "state", "action", "q_value"):
+                rows[key].append((state, action, q_value))
+            loaded = {key: QTable.from_rows(key_rows) for key, key_rows in rows.items()}
+            self.cache.set_many({self._cache_key(key): table for key, table in loaded.items()})
+            tables.update(loaded)
+        return tables
+
+    def get_qtable(self, key):
+        return self.get_qtables([key])[key]
+
+    def user_keys(self, user_id):
+        """Index of the keys a user has Q-values for, kept in the cache next to the tables."""
+        index_key = f"qtable-keys:{user_id}"
+        keys = self.cache.get(index_key)
+        if keys is None:
+            keys = list(
+                QTableEntry.objects.filter(key__startswith=make_key(user_id, ""))
+                .order_by("key")
+                .values_list("key", flat=True)
+                .distinct()
+            )
+            self.cache.set(index_key, keys)
+        return keys
+
+    def get_user_qtables(self, user_id):
+        """Return {course_id: QTable} for every course the user has Q-values in."""
+        tables = self.get_qtables(self.user_keys(user_id))
+        return {int(key.split("_", 1)[1]): table for key, table in tables.items()}
+
+    def invalidate(self, key):
+        self.cache.delete_many([self._cache_key(key), f"qtable-keys:{key.split('_', 1)[0]}"])
+
+    def avg_level(self, key):
+        """Average Q-value of every (state, action) the learner has visited in this course."""
+        return self.get_qtable(key).avg_level()
+
+    def avg_levels(self, keys):
+        """avg_level of many keys at once, as a float32 array in the order of `keys`."""
+        tables = self.get_qtables(keys)
+        return np.array([tables[key].avg_level() for key in keys], dtype=np.float32)
+
+    def choose_actions(self, keys, states):
+        """Epsilon-greedy difficulty for each (key, state) pair, ties broken at random."""
+        tables = self.get_qtables(keys)
+        rows = [tables[key].row(state) for key, state in zip(keys, states)]
+        known = np.array([row is not None for row in rows], dtype=bool)
+        q = np.array([row if row is not None else np.zeros(len(ACTIONS), dtype=np.float32) for row in rows], dtype=np.float32).reshape(-1, len(ACTIONS))
+        best = q == q.max(axis=1, keepdims=True)
+        greedy = np.argmax(np.random.random(q.shape) * best, axis=1)
+        explore = ~known | (np.random.random(len(rows)) < self.epsilon)
+        choice = np.where(explore, np.random.randint(len(ACTIONS), size=len(rows)), greedy)
+        return [ACTIONS[i] for i in choice]
+
+    def choose_action(self, key, state):
+        return self.choose_actions([key], [state])[0]
+
+    def update(self, key, state, action, reward, next_state):
+        """Apply one Q-learning step as an atomic update of the single (key, state, action) row."""
+        target = reward + self.gamma * self.get_qtable(key).max_q(next_state)
+        with transaction.atomic():
+            QTableEntry.objects.get_or_create(key=key, state=state, action=action)
+            QTableEntry.objects.filter(key=key, state=state, action=action).update(
+                q_value=F("q_value") * (1 - self.alpha) + self.alpha * target
+            )
+        self.invalidate(key)
+
+    def _load_for_update(self, keys):
+        """Read the current rows of `keys` under a row lock, bypassing the cache. Call inside a transaction."""
+        rows = {key: [] for key in keys}
+        entries = QTableEntry.objects.select_for_update().filter(key__in=keys)
+        for key, state, action, q_value in entries.values_list("key", "state", "action", "q_value"):
+            rows[key].append((state, action, q_value))
+        return {key: QTable.from_rows(key_rows) for key, key_rows in rows.items()}
+
+    def _step(self, table, state, action, reward, next_state):
+        target = reward + self.gamma * table.max_q(next_state)
+        q_value = table.get(state, action) * (1 - self.alpha) + self.alpha * target
+        table.set(state, action, q_value)
+        return q_value
+
+    def _save(self, changed, tables):
+        now = timezone.now()
+        QTableEntry.objects.bulk_create(
+            [
+                QTableEntry(key=key, state=state, action=action, q_value=q_value, updated_at=now)
+                for (key, state, action), q_value in changed.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["key", "state", "action"],
+            update_fields=["q_value", "updated_at"],
+        )
+        def refresh_cache():
+            self.cache.delete_many([f"qtable-keys:{key.split('_', 1)[0]}" for key in tables])
+            self.cache.set_many({self._cache_key(key): table for key, table in tables.items()})
+        transaction.on_commit(refresh_cache)
+
+    def update_episode(self, key, steps):
+        """Learn from a whole quiz, given as [(action, reward), ...] in answer order.
+
+        Each answer is first applied against the learner's current state, which is re-derived from
+        the average level after every step; then every step is replayed towards the final state.
+        This is the same update sequence SubmitQuizView used to issue step by step, done on one
+        in-memory table with a single read and a single write. Returns the final state.
+        """
+        with transaction.atomic():
+            table = self._load_for_update([key])[key]
+            changed = {}
+            visited = []
+            current_state = get_state(table.avg_level())
+            for action, reward in steps:
+                visited.append((current_state, action, reward))
+                changed[(key, current_state, action)] = self._step(table, current_state, action, reward, current_state)
+                current_state = get_state(table.avg_level())
+            for state, action, reward in visited:
+                changed[(key, state, action)] = self._step(table, state, action, reward, current_state)
+            self._save(changed, {key: table})
+        return current_state
+
+    def export_qtable(self, key):
+        return self.get_qtable(key).export()
@@ -0,0 +1,17 @@
+from core.qlearning.qtable import QLearningAgent, make_key
+
+
+def get_ai_level(level):
+    """Map an average Q-value to the learner level shown in the UI (kept in sync with src/lib/Qtable.js)."""
+    if level < 0.05:
+        return "Beginner"
+    elif level < 0.15:
+        return "Intermediate"
+    elif level < 0.25:
+        return "Advanced"
+    else:
+        return "Expert"
+
+
+def get_adaptation_level(user_id, course_id):
+    return QLearningAgent().avg_level(make_key(user_id, course_id))
@@ -0,0 +1,89 @@
+from collections import Counter
+from django.conf import settings
+from django.db.models import Count
+from .models import BankQuestion
+from .transcripts import build_prompt_transcript
+from core.quiz_generator.gemini import generate_question_batch
+from core.quiz_generator.validators import DIFFICULTIES
+
+QUIZ_SIZE = 10
+MAX_FILL_ATTEMPTS = 5
+
+
+def bank_sizes(video):
+    """{difficulty: banked question count} of a video, in one query."""
+    sizes = dict.fromkeys(DIFFICULTIES, 0)
+    counts = BankQuestion.objects.filter(video=video).values_list("difficulty").annotate(count=Count("id"))
+    sizes.update(counts)
+    return sizes
+
+
+def bank_questions(video, questions):
+    """Store generated questions in the bank and return how many were added per difficulty.
+
+    Questions whose text is already banked for the video, or repeated within `questions`, are
+    skipped, so a draw never holds the same question twice.
+    """
+    seen = set(BankQuestion.objects.filter(video=video).values_list("text", flat=True))
+    new_questions = []
+    for q in questions:
+        if q["text"] not in seen:
+            seen.add(q["text"])
+            new_questions.append(q)
+    BankQuestion.objects.bulk_create([
+        BankQuestion(
+            video=video,
+            text=q["text"],
+            options=q["options"],
+            correct_answer=q["correct_answer"],
+            difficulty=q["difficulty"]
+        )
+        for q in new_questions
+    ])
+    return Counter(q["difficulty"] for q in new_questions)
+
+
+def fill_question_bank(video, target=None, difficulties=DIFFICULTIES):
+    """Generate questions from the video transcript until the bank holds `target` of each difficulty.
+
+    Every attempt asks for one quiz of each difficulty still short in a single LLM call. The LLM
+    labels each question itself, so questions are banked under the difficulty they come back with.
+    Returns {difficulty: questions added}.
+    """
+    target = target or settings.QUESTION_BANK_SIZE
+    added = Counter()
+    used_chunks = set()
+    for _ in range(MAX_FILL_ATTEMPTS):
+        sizes = bank_sizes(video)
+        counts = {difficulty: QUIZ_SIZE for difficulty in difficulties if sizes[difficulty] < target}
+        if not counts:
+            break
+        # Each attempt favours transcript chunks the previous ones did not cover
+        transcript, chunks = build_prompt_transcript(video, exclude=used_chunks)
+        used_chunks |= chunks
+        batch = generate_question_batch(transcript, counts, normalized=True)
+        added += bank_questions(video, [q for questions in batch.values() for q in questions])
+    return {difficulty: added[difficulty] for difficulty in difficulties}
+
+
+def draw_questions(video, difficulty, count=QUIZ_SIZE):
+    """Draw `count` random banked questions of a difficulty.
+
+    Returns (questions, is_low): questions is None if the bank is too small, and is_low tells
+    whether the bank holds fewer than QUESTION_BANK_SIZE questions of the difficulty. Both come
+    from one query that reads up to QUESTION_BANK_SIZE rows.
+    """
+    limit = max(count, settings.QUESTION_BANK_SIZE)
+    rows = list(BankQuestion.objects.filter(video=video, difficulty=difficulty).order_by("?")[:limit])
+    is_low = len(rows) < settings.QUESTION_BANK_SIZE
+    if len(rows) < count:
+        return None, is_low
+    return [
+        {
+            "text": q.text,
+            "options": q.options,
+            "correct_answer": q.correct_answer,
+            "difficulty": q.difficulty,
+        }
+        for q in rows[:count]
+    ], is_low
@@ -0,0 +1,88 @@
+import math
+import re
+from collections import Counter
+
+WORD_REGEX = re.compile(r"[a-z0-9']+")
+SENTENCE_REGEX = re.compile(r"(?<=[.!?])\s+")
+STOPWORDS = set("""
+a about above after again against all am an and any are as at be because been before being below between both but by
+can could did do does doing down during each few for from further had has have having he her here hers herself him
+himself his how i if in into is it its itself just let me more most my myself no nor not now of off on once only or
+other our ours ourselves out over own same she should so some such than that the their theirs them themselves then
+there these they this those through to too under until up very was we were what when where which while who whom why
+will with would you your yours yourself yourselves okay ok yeah um uh like going gonna get got know really right
+thing things one two also
+""".split())
+
+
+def tokenize(text):
+    return [word for word in WORD_REGEX.findall(text.lower()) if word not in STOPWORDS and len(word) > 2]
+
+
+def split_transcript(text, chunk_words=150):
+    """Split a transcript into chunks of about `chunk_words` words, cutting at sentence ends when possible."""
+    chunks = []
+    current = []
+    count = 0
+    for sentence in SENTENCE_REGEX.split(text.strip()):
+        words = sentence.split()
+        # Whisper output can run for minutes without punctuation, so long "sentences" are cut by length
+        while words:
+            room = chunk_words - count
+            take, words = words[:room], words[room:]
+            current.extend(take)
+            count += len(take)
+            if count >= chunk_words:
+                chunks.append(" ".join(current))
+                current, count = [], 0
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def keyword_weights(chunks, top=20):
+    """TF-IDF weights of the `top` keywords of each chunk."""
+    term_counts = [Counter(tokenize(chunk)) for chunk in chunks]
+    document_frequency = Counter(term for counts in term_counts for term in counts)
+    total = len(chunks)
+    weights = []
+    for counts in term_counts:
+        length = sum(counts.values()) or 1
+        scored = {
+            term: (count / length) * (math.log((1 + total) / (1 + document_frequency[term])) + 1)
+            for term, count in counts.items()
+        }
+        weights.append(dict(sorted(scored.items(), key=lambda item: item[1], reverse=True)[:top]))
+    return weights
+
+
+def select_chunks(chunks, weights, budget_words, exclude=()):
+    """Pick chunk indexes that fit in `budget_words` and cover as many distinct keywords as possible.
+
+    Greedy coverage: each step takes the chunk whose not-yet-covered keyword weight per word is
+    highest, so near-duplicate chunks lose out to ones about something new. Chunks in `exclude`
+    (for example used by an earlier prompt) count half. Indexes are returned in transcript order.
+    """
+    sizes = [len(chunk.split()) for chunk in chunks]
+    covered = set()
+    selected = []
+    used = 0
+    candidates = set(range(len(chunks)))
+    while candidates:
+        best, best_score = None, 0.0
+        for i in candidates:
+            if used + sizes[i] > budget_words:
+                continue
+            gain = sum(weight for term, weight in weights[i].items() if term not in covered)
+            score = gain / math.sqrt(sizes[i] or 1)
+            if i in exclude:
+                score /= 2
+            if best is None or score > best_score:
+                best, best_score = i, score
+        if best is None:
+            break
+        selected.append(best)
+        used += sizes[best]
+        covered.update(weights[best])
+        candidates.discard(best)
+    return sorted(selected)
@@ -0,0 +1,53 @@
+import json
+import re
+
+BATCH_COUNT_REGEX = re.compile(r'^- (\d+) "(\w+)" questions$', re.MULTILINE)
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGeminiClient:
+    """Local stand-in for genai.Client that answers generate_content(_stream) with canned questions.
+
+    Install it with core.quiz_generator.gemini.set_client(FakeGeminiClient()). Every prompt it
+    receives is kept in `prompts` so callers can check how often the LLM was really hit. Streamed
+    responses arrive in `chunk_size` pieces.
+    """
+
+    def __init__(self, responses=None, chunk_size=64):
+        self.responses = list(responses or [])
+        self.chunk_size = chunk_size
+        self.prompts = []
+        self.models = self
+
+    def generate_content(self, model, contents, config=None):
+        self.prompts.append(contents)
+        if self.responses:
+            response = self.responses.pop(0)
+            return FakeResponse(response if isinstance(response, str) else json.dumps(response))
+        batch = BATCH_COUNT_REGEX.findall(contents)
+        if batch:
+            questions = [q for count, difficulty in batch for q in self.default_questions(int(count), difficulty)]
+            return FakeResponse(json.dumps(questions))
+        return FakeResponse(json.dumps(self.default_questions()))
+
+    def generate_content_stream(self, model, contents, config=None):
+        """generate_content, delivered in chunk_size pieces like a streamed response."""
+        text = self.generate_content(model, contents, config).text
+        for start in range(0, len(text), self.chunk_size):
+            yield FakeResponse(text[start:start + self.chunk_size])
+
+    @staticmethod
+    def default_questions(count=10, difficulty="medium"):
+        return [
+            {
+                "text": f"Sample {difficulty} question {i + 1}?",
+                "options": ["Option A", "Option B", "Option C", "Option D"],
+                "correct_answer": str(i % 4 + 1),
+                "difficulty": difficulty,
+            }
+            for i in range(count)
+        ]
@@ -1,6 +1,4 @@
-import json
 import os
-import re
 from google import genai
 from google.genai import types
 
@@ -11,44 +9,44 @@ generate_content_config = types.GenerateContentConfig(
     temperature=0.5
 )
 
-from core.quiz_generator.prompts import QUESTION_PROMPT
-
-def generate_questions(transcript, count=10, difficulty="medium", state=0.0):
-    # Remove Markdown code fences if present
-    fenceRegex = r"^```(?:json)?\s*\n?(.*?)\n?\s*```$"
-    match = re.match(fenceRegex, transcript)
-    if match and match[1]:
-        transcript = match[1].strip()
-    
-    # Format the transcript by replacing all whitespace characters with a single space
-    transcript = re.sub(r'\s+', ' ', transcript)
-    
-    prompt = QUESTION_PROMPT.format(
-        transcript=transcript,
-        count=count,
-        difficulty=difficulty,
-        state=state
-    )
+from core.quiz_generator.prompts import BATCH_QUESTION_PROMPT
+from core.quiz_generator.normalization import normalize_transcript
+from core.quiz_generator.response_parser import iter_json_array
+from core.quiz_generator.validators import collect_questions, DIFFICULTIES
+
+def set_client(new_client):
+    """Swap the Gemini client (e.g. for a FakeGeminiClient in tests) and return the previous one."""
+    global client
+    previous, client = client, new_client
+    return previous
 
-    # Request JSON output explicitly
-    resp = client.models.generate_content(
+def stream_content(prompt):
+    """Yield the LLM response text for a prompt piece by piece as it is generated."""
+    for chunk in client.models.generate_content_stream(
         model=model,
         contents=prompt,
         config=generate_content_config,
-    )
+    ):
+        if chunk.text:
+            yield chunk.text
 
-    try:
-        json_str = resp.text.strip()
+def generate_question_batch(transcript, counts, normalized=False):
+    """Generate questions for several difficulties with a single LLM call.
 
-        # Match and extract JSON content from code blocks using re.DOTALL
-        match = re.match(r"^```(?:json)?\s*(.*?)\s*```$", json_str, re.DOTALL)
-        if match:
-            json_str = match.group(1).strip()
+    `counts` maps difficulty to the number of questions wanted, e.g. {"easy": 10, "medium": 20, "hard": 10}
+    for one easy, two medium and one hard quiz. Returns {difficulty: [questions]} for every difficulty,
+    grouped by the label the LLM gave each question, so a list can be shorter or longer than requested.
+    """
+    if not normalized:
+        transcript = normalize_transcript(transcript)
 
-        # Sanitize invalid characters (like BOM, smart quotes)
-        json_str = re.sub(r"[^\x20-\x7E\s]", "", json_str)
+    prompt = BATCH_QUESTION_PROMPT.format(
+        transcript=transcript,
+        counts="\n".join(f'- {count} "{difficulty}" questions' for difficulty, count in counts.items()),
+        total=sum(counts.values()),
+    )
 
-        # Parse and return
-        return json.loads(json_str)
-    except Exception as e:
-        raise ValueError("Failed to parse questions from LLM response.")
\ No newline at end of file
+    batch = {difficulty: [] for difficulty in DIFFICULTIES}
+    for question in collect_questions(iter_json_array(stream_content(prompt))):
+        batch[question["difficulty"]].append(question)
+    return batch
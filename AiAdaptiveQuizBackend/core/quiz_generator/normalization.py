@@ -0,0 +1,17 @@
+import hashlib
+import re
+
+FENCE_REGEX = re.compile(r"^```(?:json)?\s*\n?(.*?)\n?\s*```$", re.DOTALL)
+WHITESPACE_REGEX = re.compile(r"\s+")
+
+
+def normalize_transcript(transcript):
+    """Strip a surrounding Markdown code fence and collapse all whitespace to single spaces."""
+    match = FENCE_REGEX.match(transcript)
+    if match and match[1]:
+        transcript = match[1].strip()
+    return WHITESPACE_REGEX.sub(" ", transcript)
+
+
+def transcript_digest(transcript):
+    return hashlib.sha256(transcript.encode("utf-8")).hexdigest()
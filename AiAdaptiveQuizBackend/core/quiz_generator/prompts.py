@@ -1,12 +1,14 @@
-QUESTION_PROMPT = """
-Based on the following transcript of a YouTube video, generate {count} multiple-choice quiz questions using the Q-Table learning model. The difficulty level should be '{difficulty}' and the current state is '{state}'.
+BATCH_QUESTION_PROMPT = """
+Based on the following transcript of a YouTube video, generate multiple-choice quiz questions for several difficulty levels at once:
+{counts}
 
 Each question must:
 - Have exactly 4 unique string options.
 - Use the 'correct_answer' as the string index of the correct option: "1", "2", "3", or "4".
-- Be categorized as either "easy", "medium", or "hard".
+- Be labelled with the difficulty level it was written for: "easy", "medium", or "hard".
+- Not repeat another question in this list.
 
-⚠️ Output must be a JSON array of exactly 10 objects. Each object should have:
+⚠️ Output must be a JSON array of exactly {total} objects. Each object should have:
 
 - "text": string (The question)
 - "options": array of 4 strings
@@ -17,4 +19,4 @@ Return only valid JSON — no comments, no explanations, no markdown, no sample,
 
 Transcript:
 {transcript}
-"""
\ No newline at end of file
+"""
@@ -0,0 +1,52 @@
+import json
+
+BOM = "\ufeff"
+PARSE_ERROR = "Failed to parse questions from LLM response."
+
+# strict=False accepts raw control characters (e.g. newlines) inside strings, which models emit
+_decoder = json.JSONDecoder(strict=False)
+
+
+def iter_json_array(chunks):
+    """Yield the items of a top-level JSON array as soon as each one is complete.
+
+    `chunks` is any iterable of text pieces, such as a streamed LLM response. A leading BOM or
+    Markdown code fence before the array is skipped. Raises ValueError if the text is not an array
+    or ends before the array is closed. The source is always read to the end.
+    """
+    buffer = ""
+    started = False
+    chunks = iter(chunks)
+    for chunk in chunks:
+        buffer += chunk or ""
+        if not started:
+            start = buffer.find("[")
+            if start == -1:
+                if "{" in buffer:
+                    raise ValueError(PARSE_ERROR)
+                continue
+            prefix = buffer[:start].lstrip(BOM).strip()
+            if prefix and prefix.strip("`").strip().lower() not in ("", "json"):
+                raise ValueError(PARSE_ERROR)
+            buffer = buffer[start + 1:]
+            started = True
+
+        pos = 0
+        while True:
+            while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] == ","):
+                pos += 1
+            if pos == len(buffer):
+                break
+            if buffer[pos] == "]":
+                # Drain the rest (e.g. a closing fence) so the source sees a complete response
+                for _ in chunks:
+                    pass
+                return
+            try:
+                item, pos = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # The item is still arriving
+                break
+            yield item
+        buffer = buffer[pos:]
+    raise ValueError(PARSE_ERROR)
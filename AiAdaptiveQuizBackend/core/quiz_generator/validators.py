@@ -0,0 +1,52 @@
+DIFFICULTIES = ("easy", "medium", "hard")
+ANSWER_CHOICES = ("1", "2", "3", "4")
+
+
+def validate_question(question, index=0):
+    """Check one question object and return (normalized question, list of errors)."""
+    if not isinstance(question, dict):
+        return None, [f"question {index}: not an object"]
+    errors = []
+    text = question.get("text")
+    options = question.get("options")
+    correct_answer = str(question.get("correct_answer", "")).strip()
+    difficulty = str(question.get("difficulty", "")).strip().lower()
+
+    if not isinstance(text, str) or not text.strip():
+        errors.append(f"question {index}: missing text")
+    if not isinstance(options, list) or len(options) != 4 or not all(isinstance(o, str) for o in options):
+        errors.append(f"question {index}: options must be 4 strings")
+    if correct_answer not in ANSWER_CHOICES:
+        errors.append(f"question {index}: correct_answer must be one of 1-4")
+    if difficulty not in DIFFICULTIES:
+        errors.append(f"question {index}: invalid difficulty '{difficulty}'")
+
+    return {
+        "text": text,
+        "options": options,
+        "correct_answer": correct_answer,
+        "difficulty": difficulty,
+    }, errors
+
+
+def collect_questions(questions):
+    """Check every question of an LLM payload and return them normalized.
+
+    Every question is checked before anything is returned, so callers either get a fully valid
+    list to persist or a ValueError describing all the bad entries. Takes any iterable, e.g.
+    questions parsed one by one from a streamed response.
+    """
+    errors = []
+    cleaned = []
+    for index, question in enumerate(questions):
+        question, question_errors = validate_question(question, index)
+        if question_errors:
+            errors.extend(question_errors)
+        else:
+            cleaned.append(question)
+
+    if not cleaned and not errors:
+        raise ValueError("LLM response must be a non-empty list of questions.")
+    if errors:
+        raise ValueError("Invalid questions in LLM response: " + "; ".join(errors))
+    return cleaned
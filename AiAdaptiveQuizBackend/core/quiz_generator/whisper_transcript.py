@@ -1,41 +1,269 @@
+import glob
+import hashlib
 import os
-import tempfile
+import re
+import threading
+import time
 import whisper
 import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from django.conf import settings
+
+SAMPLE_RATE = whisper.audio.SAMPLE_RATE
+YOUTUBE_ID_REGEX = re.compile(r"(?:v=|youtu\.be/|embed/|shorts/|live/)([A-Za-z0-9_-]{11})")
+
+_model = None
+_model_lock = threading.Lock()
+_pool = None
+_pool_lock = threading.Lock()
+_pinned_audio = {}
+_pinned_audio_lock = threading.Lock()
+
+
+def get_model(model_name=None, threads=None):
+    """Return this process's Whisper model, loading it on first use only."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                import torch
+                threads = threads or settings.WHISPER_THREADS
+                if threads:
+                    torch.set_num_threads(threads)
+                _model = whisper.load_model(model_name or settings.WHISPER_MODEL)
+    return _model
+
+
+def transcribe(audio_path, model_name=None, threads=None):
+    """Transcribe a local audio file and report how fast it went.
+
+    Returns {"text", "audio_seconds", "elapsed", "speed"} where speed is audio-seconds per wall-second.
+    """
+    model = get_model(model_name, threads)
+    audio = whisper.load_audio(audio_path)
+    start = time.perf_counter()
+    result = model.transcribe(audio)
+    elapsed = time.perf_counter() - start
+    audio_seconds = len(audio) / SAMPLE_RATE
+    return {
+        "text": result["text"],
+        "audio_seconds": audio_seconds,
+        "elapsed": elapsed,
+        "speed": audio_seconds / elapsed if elapsed else 0.0,
+    }
+
+
+class TranscriptionPool:
+    """A fixed set of worker processes, each holding a warm Whisper model, fed from one queue.
+
+    Whisper installs hooks on the model during inference, so a model is never shared between
+    concurrent transcriptions; each worker process loads its own copy once and keeps it.
+    """
+
+    def __init__(self, workers=None, model_name=None, threads=None):
+        self.workers = workers or settings.TRANSCRIPTION_WORKERS
+        self.model_name = model_name or settings.WHISPER_MODEL
+        self.threads = threads or settings.WHISPER_THREADS
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=get_model,
+            initargs=(self.model_name, self.threads),
+        )
+        self._stats_lock = threading.Lock()
+        self.audio_seconds = 0.0
+        self.busy_seconds = 0.0
+        self.completed = 0
+        self.started_at = time.perf_counter()
+
+    def submit(self, audio_path):
+        """Queue an audio file; the returned future resolves to the result of transcribe()."""
+        future = self.executor.submit(transcribe, audio_path, self.model_name, self.threads)
+        future.add_done_callback(self._record)
+        return future
+
+    def _record(self, future):
+        if future.exception() is not None:
+            return
+        result = future.result()
+        with self._stats_lock:
+            self.audio_seconds += result["audio_seconds"]
+            self.busy_seconds += result["elapsed"]
+            self.completed += 1
+
+    def stats(self):
+        """Totals so far; throughput is audio-seconds transcribed per wall-second since the pool started."""
+        with self._stats_lock:
+            wall = time.perf_counter() - self.started_at
+            return {
+                "completed": self.completed,
+                "audio_seconds": self.audio_seconds,
+                "wall_seconds": wall,
+                "throughput": self.audio_seconds / wall if wall else 0.0,
+            }
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+
+def get_pool():
+    """The process-wide transcription pool, started on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = TranscriptionPool()
+    return _pool
+
+
+def split_audio(audio_path, work_dir, segment_seconds=None):
+    """Cut audio into fixed-length segment files with ffmpeg, without decoding it all into memory.
+
+    The split is skipped when work_dir already holds a finished split from an earlier run.
+    """
+    segment_seconds = segment_seconds or settings.TRANSCRIPTION_SEGMENT_SECONDS
+    marker = os.path.join(work_dir, "segments.done")
+    if not os.path.exists(marker):
+        os.makedirs(work_dir, exist_ok=True)
+        for stale in glob.glob(os.path.join(work_dir, "segment_*")):
+            os.remove(stale)
+        subprocess.run([
+            "ffmpeg", "-y", "-loglevel", "error", "-i", audio_path,
+            "-f", "segment", "-segment_time", str(segment_seconds), "-c", "copy",
+            os.path.join(work_dir, "segment_%05d.mp3")
+        ], check=True, capture_output=True)
+        open(marker, "w").close()
+    return sorted(glob.glob(os.path.join(work_dir, "segment_*.mp3")))
+
+
+def transcribe_in_segments(audio_path, work_dir, segment_seconds=None, pool=None, on_segment=None):
+    """Transcribe long audio segment by segment across the worker pool and return the full text.
+
+    Each finished segment is written next to its audio as segment_NNNNN.txt, so a crashed run
+    resumes from the segments that are still missing when called again with the same work_dir.
+    on_segment(), if given, is called after each segment is written.
+    """
+    segments = split_audio(audio_path, work_dir, segment_seconds)
+    pool = pool or get_pool()
+    texts = {}
+    futures = {}
+    for segment in segments:
+        text_path = os.path.splitext(segment)[0] + ".txt"
+        if os.path.exists(text_path):
+            with open(text_path, encoding="utf-8") as f:
+                texts[segment] = f.read()
+        else:
+            futures[pool.submit(segment)] = (segment, text_path)
+
+    for future in as_completed(futures):
+        segment, text_path = futures[future]
+        text = future.result()["text"]
+        with open(text_path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(text_path + ".tmp", text_path)
+        texts[segment] = text
+        if on_segment:
+            on_segment()
+    return " ".join(texts[segment].strip() for segment in segments)
+
+
+def get_audio_cache_key(url):
+    """Cache key of a video's audio: its YouTube id when it has one, else a hash of the URL."""
+    match = YOUTUBE_ID_REGEX.search(url)
+    if match:
+        return match.group(1)
+    return hashlib.sha256(url.strip().encode("utf-8")).hexdigest()
+
+
+def pin_audio(audio_path):
+    """Protect a cached audio file from eviction in this process until unpin_audio() is called.
+
+    Pins are counted, so a file pinned twice stays protected until it is unpinned twice.
+    """
+    with _pinned_audio_lock:
+        _pinned_audio[audio_path] = _pinned_audio.get(audio_path, 0) + 1
+    try:
+        os.utime(audio_path)
+    except OSError:
+        # Evicted by another process before the pin; transcribing it will fail and be retried
+        pass
+
+
+def unpin_audio(audio_path):
+    with _pinned_audio_lock:
+        count = _pinned_audio.get(audio_path, 0) - 1
+        if count > 0:
+            _pinned_audio[audio_path] = count
+        else:
+            _pinned_audio.pop(audio_path, None)
+
+
+def evict_audio_cache(keep=None):
+    """Delete least recently used audio files until the cache fits in AUDIO_CACHE_MAX_BYTES.
+
+    Files pinned in this process are never deleted. Neither are files used within the last
+    AUDIO_CACHE_GRACE_SECONDS, which protects files another process has just downloaded or queued.
+    """
+    with _pinned_audio_lock:
+        protected = set(_pinned_audio)
+    if keep:
+        protected.add(keep)
+    grace_cutoff = time.time() - settings.AUDIO_CACHE_GRACE_SECONDS
+    files = []
+    for path in glob.glob(os.path.join(settings.AUDIO_CACHE_DIR, "*.mp3")):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in files)
+    for mtime, size, path in sorted(files):
+        if total <= settings.AUDIO_CACHE_MAX_BYTES:
+            break
+        if path in protected or mtime >= grace_cutoff:
+            continue
+        try:
+            os.remove(path)
+            total -= size
+        except FileNotFoundError:
+            pass
 
 
 def download_audio_from_youtube(url):
-    """Download audio from a YouTube video and return the file path."""
+    """Download audio from a YouTube video and return the file path.
+
+    Files live in the shared AUDIO_CACHE_DIR keyed by video, so re-transcribing (for example with a
+    new Whisper model) reuses the earlier download. Callers must not delete the returned file, and
+    should pin_audio() it while it waits to be transcribed.
+    """
     if "youtube.com" not in url and "youtu.be" not in url:
         raise ValueError("Only YouTube URLs are supported for transcript generation.")
-    temp_dir = tempfile.mkdtemp()
-    audio_path = os.path.join(temp_dir, "audio.mp3")
+    os.makedirs(settings.AUDIO_CACHE_DIR, exist_ok=True)
+    key = get_audio_cache_key(url)
+    audio_path = os.path.join(settings.AUDIO_CACHE_DIR, f"{key}.mp3")
+    try:
+        # Touching a cached file restarts its eviction grace period; a file evicted since is downloaded again
+        os.utime(audio_path)
+        return audio_path
+    except OSError:
+        pass
+
+    # Download under a private name and move it in place only once it is complete
+    partial_path = os.path.join(settings.AUDIO_CACHE_DIR, f"{key}.{os.getpid()}.{threading.get_ident()}.part")
     try:
         result = subprocess.run([
             "yt-dlp", "-f", "bestaudio", "--extract-audio", "--audio-format", "mp3",
-            "-o", audio_path, url
+            "-o", partial_path + ".%(ext)s", url
         ], capture_output=True, text=True)
         if result.returncode != 0:
             print(f"yt-dlp error: {result.stderr}")
             return None
+        os.replace(partial_path + ".mp3", audio_path)
+        evict_audio_cache(keep=audio_path)
         return audio_path
     except Exception as e:
         print(f"Failed to download audio for {url}: {e}")
         return None
+    finally:
+        for leftover in glob.glob(glob.escape(partial_path) + "*"):
+            os.remove(leftover)
 
-
-def generate_transcript_from_url(url):
-    """Download audio from a video URL and generate transcript using Whisper."""
-    try:
-        print(f"Attempting to download audio from: {url}")
-        audio_path = download_audio_from_youtube(url)
-        if not audio_path:
-            return ""
-        model = whisper.load_model("base")
-        result = model.transcribe(audio_path)
-        transcript = result["text"]
-        os.remove(audio_path)
-        return transcript
-    except Exception as e:
-        print(f"Error for URL {url}: {e}")
-        return "Failed to generate transcript"
\ No newline at end of file
@@ -0,0 +1,213 @@
+import random
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import QuizSession, Question, QuizGenerationJob, Video
+from .question_bank import QUIZ_SIZE, bank_sizes, bank_questions, draw_questions
+from .transcripts import build_prompt_transcript
+from core.quiz_generator.gemini import generate_question_batch
+from core.quiz_generator.validators import DIFFICULTIES
+
+_executor = ThreadPoolExecutor(max_workers=settings.QUIZ_GENERATION_WORKERS, thread_name_prefix="quiz-generation")
+
+# video id -> True when more work arrived while its generation run was queued or in progress
+_scheduled = {}
+_scheduled_lock = threading.Lock()
+
+
+def save_quiz(session, questions, adaptation_level):
+    """Attach generated questions to a session in one transaction.
+
+    Returns False without writing anything if the session already got a quiz from a concurrent request.
+    """
+    with transaction.atomic():
+        generated = QuizSession.objects.filter(pk=session.pk, is_quiz_generated=False).update(
+            adaptation_level=adaptation_level,
+            completed_at=timezone.now(),
+            is_quiz_generated=True,
+            is_quiz_submitted=False,
+            score=0,
+            stars=0,
+            updated_at=timezone.now(),
+        )
+        if generated:
+            Question.objects.bulk_create([
+                Question(
+                    session=session,
+                    text=q["text"],
+                    options=q["options"],
+                    correct_answer=q["correct_answer"],
+                    difficulty=q["difficulty"]
+                )
+                for q in questions
+            ])
+    session.refresh_from_db()
+    return bool(generated)
+
+
+def draw_quiz(video, difficulty):
+    """Draw a quiz from the question bank and schedule a top-up when the bank runs low."""
+    questions, is_low = draw_questions(video, difficulty)
+    if is_low:
+        schedule_video_generation(video.id)
+    return questions
+
+
+def get_active_job(session):
+    """The pending or running job of a session, ignoring jobs orphaned by a worker restart."""
+    cutoff = timezone.now() - timedelta(seconds=settings.QUIZ_GENERATION_JOB_TIMEOUT)
+    return (
+        QuizGenerationJob.objects.filter(
+            session=session,
+            status__in=[QuizGenerationJob.STATUS_PENDING, QuizGenerationJob.STATUS_RUNNING],
+            updated_at__gte=cutoff,
+        )
+        .order_by("-created_at")
+        .first()
+    )
+
+
+def fail_if_stale(job):
+    """Mark a pending or running job failed once it is past the cutoff get_active_job() applies.
+
+    Such a job was orphaned by a worker restart and will never finish, so pollers must stop.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.QUIZ_GENERATION_JOB_TIMEOUT)
+    if job.is_finished or job.updated_at >= cutoff:
+        return job
+    # Conditional, so a job a worker claimed or finished in the meantime keeps its status
+    QuizGenerationJob.objects.filter(
+        pk=job.pk,
+        status__in=[QuizGenerationJob.STATUS_PENDING, QuizGenerationJob.STATUS_RUNNING],
+        updated_at__lt=cutoff,
+    ).update(
+        status=QuizGenerationJob.STATUS_FAILED,
+        error="Quiz generation timed out.",
+        updated_at=timezone.now(),
+    )
+    job.refresh_from_db()
+    return job
+
+
+def enqueue_quiz_generation(session, difficulty, state, adaptation_level):
+    """Create a generation job for a session and schedule a generation run for its video."""
+    job = QuizGenerationJob.objects.create(
+        session=session,
+        difficulty=difficulty,
+        state=state,
+        adaptation_level=adaptation_level,
+    )
+    transaction.on_commit(lambda: schedule_video_generation(session.video_id))
+    return job
+
+
+def schedule_video_generation(video_id):
+    """Queue a generation run for a video, coalescing with one that is already queued or running.
+
+    A request that arrives during a run flags it, and the run goes round once more to pick up the
+    jobs created meanwhile. However many learners are waiting, a video costs one LLM call per round.
+    """
+    with _scheduled_lock:
+        if video_id in _scheduled:
+            _scheduled[video_id] = True
+            return
+        _scheduled[video_id] = False
+    _executor.submit(run_video_generation, video_id)
+
+
+def run_video_generation(video_id):
+    """Worker entry point: generation rounds for one video until no new requests came in."""
+    try:
+        while True:
+            try:
+                generate_for_video(video_id)
+            except Exception as e:
+                print(f"Quiz generation for video {video_id} crashed: {e}")
+            with _scheduled_lock:
+                if not _scheduled[video_id]:
+                    del _scheduled[video_id]
+                    return
+                _scheduled[video_id] = False
+    finally:
+        connection.close()
+
+
+def claim_pending_jobs(video_id):
+    """Mark the video's pending jobs running, skipping any another process claimed first."""
+    cutoff = timezone.now() - timedelta(seconds=settings.QUIZ_GENERATION_JOB_TIMEOUT)
+    candidates = QuizGenerationJob.objects.filter(
+        session__video_id=video_id,
+        status=QuizGenerationJob.STATUS_PENDING,
+        updated_at__gte=cutoff,
+    ).values_list("pk", flat=True)
+    claimed = [
+        pk for pk in candidates
+        if QuizGenerationJob.objects.filter(pk=pk, status=QuizGenerationJob.STATUS_PENDING).update(
+            status=QuizGenerationJob.STATUS_RUNNING,
+            updated_at=timezone.now(),
+        )
+    ]
+    return list(QuizGenerationJob.objects.select_related("session").filter(pk__in=claimed).order_by("created_at"))
+
+
+def pick_quiz(batch, remaining, difficulty):
+    """Questions for one learner: an unused set of the difficulty, else a reused one, else mixed labels."""
+    if len(remaining[difficulty]) >= QUIZ_SIZE:
+        questions = remaining[difficulty][:QUIZ_SIZE]
+        del remaining[difficulty][:QUIZ_SIZE]
+        return questions
+    if len(batch[difficulty]) >= QUIZ_SIZE:
+        return random.sample(batch[difficulty], QUIZ_SIZE)
+    # The LLM labelled too few questions with this difficulty; top up with its other questions
+    others = [q for d in DIFFICULTIES if d != difficulty for q in batch[d]]
+    questions = batch[difficulty] + others[:QUIZ_SIZE - len(batch[difficulty])]
+    return questions if len(questions) == QUIZ_SIZE else None
+
+
+def generate_for_video(video_id):
+    """One generation round: a single batched LLM call fanned out to every waiting session.
+
+    The batch holds one quiz per difficulty that learners are waiting on or whose question bank
+    is running low, plus extra variants for difficulties that several learners are waiting on (up
+    to QUIZ_BATCH_MAX_VARIANTS). Sets nobody received go to the question bank of low difficulties.
+    """
+    jobs = claim_pending_jobs(video_id)
+    video = Video.objects.get(pk=video_id)
+    low = [d for d, size in bank_sizes(video).items() if size < settings.QUESTION_BANK_SIZE]
+    if not jobs and not low:
+        return
+
+    demand = Counter(job.difficulty for job in jobs)
+    # Difficulties with a full bank and nobody waiting are left out of the call
+    counts = {
+        d: QUIZ_SIZE * min(demand[d] or 1, settings.QUIZ_BATCH_MAX_VARIANTS)
+        for d in DIFFICULTIES
+        if demand[d] or d in low
+    }
+    try:
+        transcript, _ = build_prompt_transcript(video)
+        batch = generate_question_batch(transcript, counts, normalized=True)
+    except Exception as e:
+        QuizGenerationJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+            status=QuizGenerationJob.STATUS_FAILED,
+            error=str(e),
+            updated_at=timezone.now(),
+        )
+        raise
+
+    remaining = {d: list(questions) for d, questions in batch.items()}
+    for job in jobs:
+        questions = pick_quiz(batch, remaining, job.difficulty)
+        if questions is None:
+            job.status = QuizGenerationJob.STATUS_FAILED
+            job.error = "Not enough questions in LLM response."
+        else:
+            save_quiz(job.session, questions, job.adaptation_level)
+            job.status = QuizGenerationJob.STATUS_COMPLETED
+        job.save(update_fields=["status", "error", "updated_at"])
+
+    bank_questions(video, [q for d in low for q in remaining[d]])
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Category, Course, Video, QuizSession, Question
+from .models import Category, Course, Video, QuizSession, Question, QuizGenerationJob
 
 class QuestionSerializer(serializers.ModelSerializer):
     is_correct = serializers.ReadOnlyField()
@@ -31,16 +31,29 @@ class QuizSessionSerializer(serializers.ModelSerializer):
         model = QuizSession
         fields = "__all__"
 
+class QuizGenerationJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.ReadOnlyField(source="id")
+    is_finished = serializers.ReadOnlyField()
+
+    class Meta:
+        model = QuizGenerationJob
+        fields = ["job_id", "session", "status", "difficulty", "error", "is_finished", "created_at", "updated_at"]
+
 class VideoSerializer(serializers.ModelSerializer):
     is_transcript_generated = serializers.ReadOnlyField()
     is_video_started = serializers.SerializerMethodField()
     is_video_completed = serializers.SerializerMethodField()
     
+    # Videos from Video.objects.with_user_status are served from the annotations
     def get_is_video_started(self, obj):
+        if hasattr(obj, "is_started"):
+            return obj.is_started
         user = self.context["request"].user
         return obj.is_video_started_by_user(user)
     
     def get_is_video_completed(self, obj):
+        if hasattr(obj, "is_completed"):
+            return obj.is_completed
         user = self.context["request"].user
         return obj.is_video_completed_by_user(user)
     
@@ -48,28 +61,48 @@ class VideoSerializer(serializers.ModelSerializer):
         model = Video
         fields = ["id", "title", "video_url", "is_transcript_generated", "course", "created_at", "updated_at", "is_video_started", "is_video_completed"]
 
-class CourseSerializer(serializers.ModelSerializer):
-    progress = serializers.SerializerMethodField()
-    is_course_started = serializers.SerializerMethodField()
-    is_course_completed = serializers.SerializerMethodField()
-    total_videos = serializers.ReadOnlyField()
-    
+class CatalogCourseSerializer(serializers.ModelSerializer):
+    """A catalog course without the per-user fields CourseSerializer adds to it."""
+    total_videos = serializers.SerializerMethodField()
+
     class Meta:
         model = Course
         fields = "__all__"
+
+    def get_total_videos(self, obj):
+        if hasattr(obj, "video_count"):
+            return obj.video_count
+        return obj.total_videos
+
+class CourseSerializer(CatalogCourseSerializer):
+    progress = serializers.SerializerMethodField()
+    is_course_started = serializers.SerializerMethodField()
+    is_course_completed = serializers.SerializerMethodField()
     
+    # Courses from Course.objects.with_user_progress are served from the annotations
     def get_progress(self, obj):
+        if hasattr(obj, "completed_video_count"):
+            return float(obj.completed_video_count / obj.video_count) if obj.video_count else 0
         user = self.context["request"].user
         return obj.progress_percentage(user)
     
     def get_is_course_started(self, obj):
+        if hasattr(obj, "is_started"):
+            return obj.is_started
         user = self.context["request"].user
         return obj.is_course_started_by_user(user)
     
     def get_is_course_completed(self, obj):
+        if hasattr(obj, "is_completed"):
+            return obj.is_completed
         user = self.context["request"].user
         return obj.is_course_completed_by_user(user)
     
+class CourseProgressSerializer(CourseSerializer):
+    class Meta:
+        model = Course
+        fields = ["id", "progress", "is_course_started", "is_course_completed"]
+
 class CourseDetailSerializer(serializers.ModelSerializer):
     videos = VideoSerializer(many=True, read_only=True)
     progress = serializers.SerializerMethodField()
@@ -98,3 +131,9 @@ class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
         fields = "__all__"
+
+class CatalogCategorySerializer(serializers.ModelSerializer):
+    courses = CatalogCourseSerializer(many=True, read_only=True)
+    class Meta:
+        model = Category
+        fields = "__all__"
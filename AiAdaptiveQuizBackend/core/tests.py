@@ -0,0 +1,242 @@
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.urls import reverse
+from django.utils import timezone
+from django.test import SimpleTestCase
+from rest_framework.test import APITestCase
+from .models import BankQuestion, Category, Course, Video, QuizSession, Question, QuizGenerationJob
+from .question_bank import QUIZ_SIZE, bank_questions, bank_sizes, draw_questions
+from .quiz_jobs import generate_for_video
+from .quiz_generator import gemini
+from .quiz_generator.fake_client import FakeGeminiClient
+
+User = get_user_model()
+
+
+class DashboardInfoQueryCountTests(APITestCase):
+    """DashboardInfoView must run a fixed number of queries, however big the catalog is."""
+
+    # Stats aggregate, annotated courses, sessions with video and course, Q-table rows
+    QUERIES = 4
+
+    def setUp(self):
+        caches["qtable"].clear()
+        self.user = User.objects.create_user(email="learner@example.com", password="password")
+        self.client.force_authenticate(self.user)
+        self.category = Category.objects.create(name="Science")
+
+    def build_catalog(self, courses, videos_per_course=3):
+        first = Course.objects.count()
+        for c in range(first, first + courses):
+            course = Course.objects.create(category=self.category, title=f"Course {c}", description="Description")
+            videos = Video.objects.bulk_create([
+                Video(course=course, title=f"Video {c}-{v}", video_url="https://example.com", transcript="Transcript")
+                for v in range(videos_per_course)
+            ])
+            # Alternate between courses the user completed, started and never opened
+            watched = videos if c % 3 == 0 else videos[:1] if c % 3 == 1 else []
+            for video in watched:
+                QuizSession.objects.create(
+                    user=self.user,
+                    video=video,
+                    completed_at=timezone.now(),
+                    is_quiz_generated=True,
+                    is_quiz_submitted=True,
+                    score=80,
+                    stars=4,
+                )
+
+    def test_query_count_is_constant(self):
+        for courses in (3, 12):
+            caches["qtable"].clear()
+            self.build_catalog(courses)
+            with self.assertNumQueries(self.QUERIES):
+                response = self.client.get(reverse("dashboard-info"))
+            self.assertEqual(response.status_code, 200)
+
+    def test_new_user_is_beginner(self):
+        self.build_catalog(3)
+        new_user = User.objects.create_user(email="new@example.com", password="password")
+        self.client.force_authenticate(new_user)
+        response = self.client.get(reverse("dashboard-info"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["stats"]["adaptationLevel"], "Beginner")
+
+
+class QuizGenerationStatusTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="learner@example.com", password="password")
+        self.client.force_authenticate(self.user)
+        category = Category.objects.create(name="Science")
+        self.course = Course.objects.create(category=category, title="Course", description="Description")
+        self.video = Video.objects.create(course=self.course, title="Video", video_url="https://example.com", transcript="Transcript")
+        session = QuizSession.objects.create(user=self.user, video=self.video)
+        self.job = QuizGenerationJob.objects.create(session=session, difficulty="easy")
+        self.url = reverse("generate-quiz-status", args=[self.course.id, self.video.id])
+
+    def test_fresh_job_stays_pending(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["status"], QuizGenerationJob.STATUS_PENDING)
+
+    def test_orphaned_job_is_reported_failed(self):
+        stale = timezone.now() - timedelta(seconds=settings.QUIZ_GENERATION_JOB_TIMEOUT + 1)
+        QuizGenerationJob.objects.filter(pk=self.job.pk).update(updated_at=stale)
+        response = self.client.get(self.url)
+        self.assertEqual(response.data["status"], QuizGenerationJob.STATUS_FAILED)
+        self.assertTrue(response.data["is_finished"])
+
+
+class SubmitQuizTests(APITestCase):
+    def setUp(self):
+        caches["qtable"].clear()
+        self.user = User.objects.create_user(email="learner@example.com", password="password")
+        self.client.force_authenticate(self.user)
+        category = Category.objects.create(name="Science")
+        course = Course.objects.create(category=category, title="Course", description="Description")
+        video = Video.objects.create(course=course, title="Video", video_url="https://example.com", transcript="Transcript")
+        self.session = QuizSession.objects.create(user=self.user, video=video, is_quiz_generated=True)
+        self.question = Question.objects.create(
+            session=self.session,
+            text="Question?",
+            options=["A", "B", "C", "D"],
+            correct_answer="2",
+            difficulty="easy",
+        )
+        self.url = reverse("submit-quiz", args=[course.id, video.id])
+
+    def test_malformed_answers_are_rejected(self):
+        for answers in (
+            [{"selected": 2}],
+            [{"question_id": "abc", "selected": 2}],
+            [{"question_id": self.question.id}],
+            [{"question_id": self.question.id, "selected": 7}],
+            ["2"],
+            {"question_id": self.question.id, "selected": 2},
+        ):
+            response = self.client.post(self.url, {"answers": answers}, format="json")
+            self.assertEqual(response.status_code, 400, answers)
+        self.session.refresh_from_db()
+        self.assertFalse(self.session.is_quiz_submitted)
+
+    def test_answers_are_graded(self):
+        response = self.client.post(self.url, {"answers": [{"question_id": self.question.id, "selected": 2}]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.session.refresh_from_db()
+        self.assertTrue(self.session.is_quiz_submitted)
+        self.assertEqual(self.session.score, 100)
+
+
+class GenerateQuestionBatchTests(SimpleTestCase):
+    COUNTS = {"easy": 10, "medium": 20, "hard": 10}
+
+    def use_client(self, client):
+        previous = gemini.set_client(client)
+        self.addCleanup(gemini.set_client, previous)
+        return client
+
+    def test_counts_per_difficulty(self):
+        client = self.use_client(FakeGeminiClient())
+        batch = gemini.generate_question_batch("Transcript", self.COUNTS)
+        self.assertEqual({d: len(questions) for d, questions in batch.items()}, self.COUNTS)
+        self.assertTrue(all(q["difficulty"] == d for d, questions in batch.items() for q in questions))
+        self.assertEqual(len(client.prompts), 1)
+
+    def test_chunked_stream(self):
+        self.use_client(FakeGeminiClient(chunk_size=1))
+        batch = gemini.generate_question_batch("Transcript", self.COUNTS)
+        self.assertEqual({d: len(questions) for d, questions in batch.items()}, self.COUNTS)
+
+    def test_code_fence(self):
+        questions = FakeGeminiClient.default_questions(10, "hard")
+        self.use_client(FakeGeminiClient([f"```json\n{json.dumps(questions)}\n```"], chunk_size=7))
+        batch = gemini.generate_question_batch("Transcript", {"hard": 10})
+        self.assertEqual(batch["hard"], questions)
+
+    def test_malformed_json(self):
+        questions = json.dumps(FakeGeminiClient.default_questions(10))
+        for response in ("Sorry, I can't help with that.", '{"questions": []}', questions[:-40]):
+            self.use_client(FakeGeminiClient([response], chunk_size=16))
+            with self.assertRaises(ValueError):
+                gemini.generate_question_batch("Transcript", self.COUNTS)
+
+    def test_invalid_question(self):
+        questions = FakeGeminiClient.default_questions(10)
+        questions[3]["options"] = ["Only one"]
+        self.use_client(FakeGeminiClient([questions]))
+        with self.assertRaisesMessage(ValueError, "question 3: options must be 4 strings"):
+            gemini.generate_question_batch("Transcript", {"medium": 10})
+
+
+class GenerateForVideoTests(APITestCase):
+    def setUp(self):
+        self.llm = FakeGeminiClient()
+        previous = gemini.set_client(self.llm)
+        self.addCleanup(gemini.set_client, previous)
+        category = Category.objects.create(name="Science")
+        course = Course.objects.create(category=category, title="Course", description="Description")
+        self.video = Video.objects.create(course=course, title="Video", video_url="https://example.com", transcript="Transcript")
+
+    def fill_bank(self, *difficulties):
+        bank_questions(self.video, [
+            q for d in difficulties for q in FakeGeminiClient.default_questions(settings.QUESTION_BANK_SIZE, d)
+        ])
+
+    def wait_for_quiz(self, difficulty, n):
+        user = User.objects.create_user(email=f"learner{n}@example.com", password="password")
+        session = QuizSession.objects.create(user=user, video=self.video)
+        return QuizGenerationJob.objects.create(session=session, difficulty=difficulty)
+
+    def test_waiting_sessions_share_one_llm_call(self):
+        self.fill_bank("easy", "medium", "hard")
+        jobs = [self.wait_for_quiz(difficulty, n) for n, difficulty in enumerate(["easy"] * 3 + ["medium"] * 2)]
+        generate_for_video(self.video.id)
+
+        self.assertEqual(len(self.llm.prompts), 1)
+        # Only the difficulties learners wait on are requested while the bank is full
+        self.assertIn('- 30 "easy" questions', self.llm.prompts[0])
+        self.assertIn('- 20 "medium" questions', self.llm.prompts[0])
+        self.assertNotIn('"hard" questions', self.llm.prompts[0])
+        for job in jobs:
+            job.refresh_from_db()
+            self.assertEqual(job.status, QuizGenerationJob.STATUS_COMPLETED)
+            self.assertEqual(job.session.questions.count(), QUIZ_SIZE)
+            self.assertEqual(set(job.session.questions.values_list("difficulty", flat=True)), {job.difficulty})
+        # Learners waiting on the same difficulty get different quizzes
+        easy_texts = [set(job.session.questions.values_list("text", flat=True)) for job in jobs[:3]]
+        self.assertFalse(easy_texts[0] & easy_texts[1] or easy_texts[1] & easy_texts[2])
+
+    def test_low_bank_is_topped_up(self):
+        self.fill_bank("easy", "medium")
+        generate_for_video(self.video.id)
+
+        self.assertEqual(len(self.llm.prompts), 1)
+        self.assertNotIn('"easy" questions', self.llm.prompts[0])
+        self.assertEqual(bank_sizes(self.video)["hard"], QUIZ_SIZE)
+
+    def test_full_bank_and_no_demand_skips_the_llm(self):
+        self.fill_bank("easy", "medium", "hard")
+        generate_for_video(self.video.id)
+        self.assertEqual(self.llm.prompts, [])
+
+
+class DrawQuestionsTests(APITestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Science")
+        course = Course.objects.create(category=category, title="Course", description="Description")
+        self.video = Video.objects.create(course=course, title="Video", video_url="https://example.com", transcript="Transcript")
+
+    def test_draw_reports_a_low_bank_in_one_query(self):
+        for banked, drawn, is_low in (
+            (QUIZ_SIZE // 2, None, True),
+            (QUIZ_SIZE, QUIZ_SIZE, True),
+            (settings.QUESTION_BANK_SIZE, QUIZ_SIZE, False),
+        ):
+            BankQuestion.objects.all().delete()
+            bank_questions(self.video, FakeGeminiClient.default_questions(banked, "easy"))
+            with self.assertNumQueries(1):
+                questions, low = draw_questions(self.video, "easy")
+            self.assertEqual(questions and len(questions), drawn)
+            self.assertEqual(low, is_low)
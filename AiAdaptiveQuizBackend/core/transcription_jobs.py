@@ -0,0 +1,143 @@
+import os
+import shutil
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Video, TranscriptionJob
+
+POLL_INTERVAL = 5
+
+_worker = None
+_worker_lock = threading.Lock()
+_wakeup = threading.Event()
+
+
+def enqueue_transcription(video, start_worker=None):
+    """Queue a video for transcription; a video never has more than one job.
+
+    The in-process worker is started on commit when start_worker is true, which defaults to
+    TRANSCRIPTION_WORKER_AUTOSTART. Otherwise the job waits for `manage.py run_transcription_worker`.
+    """
+    job, created = TranscriptionJob.objects.get_or_create(video=video)
+    if not created and job.status in (TranscriptionJob.STATUS_COMPLETED, TranscriptionJob.STATUS_FAILED):
+        TranscriptionJob.objects.filter(pk=job.pk).update(
+            status=TranscriptionJob.STATUS_PENDING,
+            attempts=0,
+            next_attempt_at=timezone.now(),
+            error="",
+            updated_at=timezone.now(),
+        )
+    if start_worker is None:
+        start_worker = settings.TRANSCRIPTION_WORKER_AUTOSTART
+    if start_worker:
+        transaction.on_commit(ensure_worker)
+    return job
+
+
+def ensure_worker():
+    """Start this process's single transcription worker thread if needed, and wake it up."""
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=run_worker, name="transcription-worker")
+            _worker.daemon = True
+            _worker.start()
+    _wakeup.set()
+
+
+def recover_stale_jobs():
+    """Put jobs left running by a crashed or restarted worker back in the queue."""
+    cutoff = timezone.now() - timedelta(seconds=settings.TRANSCRIPTION_JOB_TIMEOUT)
+    return TranscriptionJob.objects.filter(status=TranscriptionJob.STATUS_RUNNING, updated_at__lt=cutoff).update(
+        status=TranscriptionJob.STATUS_PENDING,
+        updated_at=timezone.now(),
+    )
+
+
+def claim_next_job():
+    """Atomically take the oldest due pending job, so several workers never run the same one."""
+    now = timezone.now()
+    candidates = (
+        TranscriptionJob.objects.filter(status=TranscriptionJob.STATUS_PENDING, next_attempt_at__lte=now)
+        .order_by("next_attempt_at")
+        .values_list("pk", flat=True)[:10]
+    )
+    for pk in candidates:
+        claimed = TranscriptionJob.objects.filter(pk=pk, status=TranscriptionJob.STATUS_PENDING).update(
+            status=TranscriptionJob.STATUS_RUNNING,
+            attempts=F("attempts") + 1,
+            updated_at=now,
+        )
+        if claimed:
+            return TranscriptionJob.objects.select_related("video").get(pk=pk)
+    return None
+
+
+def heartbeat(job):
+    """Refresh a running job's updated_at, so recover_stale_jobs() leaves a long transcription alone."""
+    TranscriptionJob.objects.filter(pk=job.pk, status=TranscriptionJob.STATUS_RUNNING).update(updated_at=timezone.now())
+
+
+def process_job(job):
+    """Download and transcribe one video, then record success or schedule a retry with backoff."""
+    from core.quiz_generator.whisper_transcript import download_audio_from_youtube, pin_audio, unpin_audio, transcribe_in_segments
+
+    # Segment transcripts survive in work_dir, so a retry after a crash only redoes the missing ones
+    work_dir = os.path.join(settings.TRANSCRIPTION_WORK_DIR, f"video_{job.video_id}")
+    try:
+        audio_path = download_audio_from_youtube(job.video.video_url)
+        if not audio_path:
+            raise RuntimeError("Audio download failed")
+        heartbeat(job)
+        pin_audio(audio_path)
+        try:
+            transcript = transcribe_in_segments(audio_path, work_dir, on_segment=lambda: heartbeat(job))
+        finally:
+            unpin_audio(audio_path)
+    except Exception as e:
+        if job.attempts >= settings.TRANSCRIPTION_MAX_ATTEMPTS:
+            TranscriptionJob.objects.filter(pk=job.pk).update(
+                status=TranscriptionJob.STATUS_FAILED,
+                error=str(e),
+                updated_at=timezone.now(),
+            )
+            Video.objects.filter(pk=job.video_id).update(**Video.transcript_fields("Failed to generate transcript"), updated_at=timezone.now())
+        else:
+            backoff = settings.TRANSCRIPTION_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+            TranscriptionJob.objects.filter(pk=job.pk).update(
+                status=TranscriptionJob.STATUS_PENDING,
+                next_attempt_at=timezone.now() + timedelta(seconds=backoff),
+                error=str(e),
+                updated_at=timezone.now(),
+            )
+        return False
+
+    with transaction.atomic():
+        Video.objects.filter(pk=job.video_id).update(**Video.transcript_fields(transcript), updated_at=timezone.now())
+        TranscriptionJob.objects.filter(pk=job.pk).update(
+            status=TranscriptionJob.STATUS_COMPLETED,
+            error="",
+            updated_at=timezone.now(),
+        )
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return True
+
+
+def run_worker(stop_when_idle=False):
+    """Process queued jobs one at a time; sleeps until woken or POLL_INTERVAL passes when idle."""
+    try:
+        recover_stale_jobs()
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if stop_when_idle:
+                    return
+                _wakeup.wait(POLL_INTERVAL)
+                _wakeup.clear()
+                continue
+            process_job(job)
+    finally:
+        connection.close()
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.db import transaction
+from .models import TranscriptChunk
+from core.quiz_generator.chunking import split_transcript, keyword_weights, select_chunks
+
+
+def get_transcript_chunks(video):
+    """The stored chunks of a video's transcript, re-cut only when the transcript has changed."""
+    digest = video.transcript_digest
+    chunks = list(video.transcript_chunks.all())
+    if chunks and chunks[0].source_digest == digest:
+        return chunks
+
+    texts = split_transcript(video.normalized_transcript, settings.TRANSCRIPT_CHUNK_WORDS)
+    weights = keyword_weights(texts)
+    chunks = [
+        TranscriptChunk(
+            video=video,
+            index=index,
+            text=text,
+            word_count=len(text.split()),
+            keywords=keywords,
+            source_digest=digest,
+        )
+        for index, (text, keywords) in enumerate(zip(texts, weights))
+    ]
+    with transaction.atomic():
+        TranscriptChunk.objects.filter(video=video).delete()
+        TranscriptChunk.objects.bulk_create(chunks)
+    return chunks
+
+
+def build_prompt_transcript(video, exclude=()):
+    """Transcript text for a quiz prompt, kept within QUIZ_PROMPT_TRANSCRIPT_WORDS.
+
+    Short transcripts are used whole. Longer ones are reduced to a diverse set of chunks; pass the
+    indexes returned by earlier calls as `exclude` to steer the next prompt towards other parts.
+    The text is already normalized (see Video.transcript_fields). Returns (text, chunk_indexes).
+    """
+    if video.transcript and not video.transcript_digest:
+        # Written by a bulk path that bypassed Video.save
+        video.set_transcript(video.transcript)
+    budget = settings.QUIZ_PROMPT_TRANSCRIPT_WORDS
+    # Normalized text has exactly one space between words
+    if video.normalized_transcript.count(" ") < budget:
+        return video.normalized_transcript, set()
+
+    chunks = get_transcript_chunks(video)
+    selected = select_chunks(
+        [chunk.text for chunk in chunks],
+        [chunk.keywords for chunk in chunks],
+        budget,
+        exclude=set(exclude),
+    )
+    parts = []
+    previous = None
+    for i in selected:
+        if previous is not None and i != previous + 1:
+            parts.append("...")
+        parts.append(chunks[i].text)
+        previous = i
+    return " ".join(parts), set(selected)
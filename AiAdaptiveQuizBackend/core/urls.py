@@ -1,7 +1,10 @@
 from django.urls import path
 from .views import (
     CategoryListView,
+    CatalogTreeView,
+    CatalogProgressView,
     GenerateQuizView,
+    QuizGenerationStatusView,
     SubmitQuizView,
     QuizSessionDetailView,
     CourseOverviewView,
@@ -13,9 +16,12 @@ from .views import (
 
 urlpatterns = [
     path("catalog/", CategoryListView.as_view(), name="catalog"),
+    path("catalog/tree/", CatalogTreeView.as_view(), name="catalog-tree"),
+    path("catalog/progress/", CatalogProgressView.as_view(), name="catalog-progress"),
     path("course/<int:course_id>/overview/", CourseOverviewView.as_view(), name="course-overview"),
     path("course/<int:course_id>/videos/<int:video_id>/start/", VideoDetailView.as_view(), name="video-detail"),
     path("course/<int:course_id>/videos/<int:video_id>/complete/", GenerateQuizView.as_view(), name="generate-quiz"),
+    path("course/<int:course_id>/videos/<int:video_id>/complete/status/", QuizGenerationStatusView.as_view(), name="generate-quiz-status"),
     path("course/<int:course_id>/videos/<int:video_id>/quiz", QuizSessionDetailView.as_view(), name="quiz-detail"),
     path("course/<int:course_id>/videos/<int:video_id>/quiz/submit", SubmitQuizView.as_view(), name="submit-quiz"),
 
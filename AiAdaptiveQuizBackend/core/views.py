@@ -1,27 +1,66 @@
+import json
+from django.http import StreamingHttpResponse
 from rest_framework import generics, views, permissions, status
 from rest_framework.response import Response
-from .models import Category, Course, Video, QuizSession, Question
+from .models import Category, Course, Video, QuizSession, Question, QuizGenerationJob
 from .serializers import (
     CategorySerializer,
+    CatalogCategorySerializer,
+    CourseProgressSerializer,
     CourseSerializer,
     VideoSerializer,
     QuizSessionSerializer,
     QuestionSerializer,
     QuizSessionSubmitSerializer,
+    QuizGenerationJobSerializer,
 )
-from django.db.models import Sum, Avg
-from core.quiz_generator.gemini import generate_questions
-from core.qlearning.qtable import QLearningAgent
+from django.db.models import Sum, Prefetch
+from core.quiz_jobs import draw_quiz, save_quiz, get_active_job, enqueue_quiz_generation, fail_if_stale
+from core.qlearning.qtable import QLearningAgent, get_state, make_key
 from django.utils import timezone
+from django.db import transaction
 from core.qlearning.utils import get_adaptation_level, get_ai_level
+from core.quiz_generator.validators import ANSWER_CHOICES
+from core.dashboard import (
+    get_user_stats,
+    get_recent_sessions,
+    get_recent_course_ids,
+    build_activities,
+)
 
 agent = QLearningAgent()
 
 class CategoryListView(generics.ListAPIView):
-    queryset = Category.objects.prefetch_related("courses__videos")
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_queryset(self):
+        courses = Course.objects.with_user_progress(self.request.user)
+        return Category.objects.prefetch_related(Prefetch("courses", queryset=courses))
+
+class CatalogTreeView(generics.ListAPIView):
+    """The catalog without per-user fields; the same for every user, so caches can share it."""
+    serializer_class = CatalogCategorySerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        return Category.objects.prefetch_related(Prefetch("courses", queryset=Course.objects.with_video_count()))
+
+class CatalogProgressView(views.APIView):
+    """The user's progress fields of the catalog courses they started, keyed by course id.
+
+    Together with CatalogTreeView this is the catalog split into a shared part and a small
+    per-user overlay; courses missing here are not started.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        courses = Course.objects.with_user_progress(request.user).filter(is_started=True)
+        progress = {}
+        for course in CourseProgressSerializer(courses, many=True, context={"request": request}).data:
+            progress[course.pop("id")] = course
+        return Response(progress)
+
 class GenerateQuizView(views.APIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -38,92 +77,97 @@ class GenerateQuizView(views.APIView):
         except QuizSession.DoesNotExist:
             return Response({"error": "Quiz session not found"}, status=404)
 
+        # A generation already in flight for this session is reported instead of started twice
+        job = get_active_job(session)
+        if job:
+            return Response(QuizGenerationJobSerializer(job).data, status=202)
+
         # Create Q-table key
-        key = f"{user.id}_{video.course.id}"
-        state = str(agent.avg_level(key))[:4]
+        key = make_key(user.id, video.course_id)
+        state = get_state(agent.avg_level(key))
         difficulty = agent.choose_action(key, state)
+        adaptation_level = agent.avg_level(key)
 
-        # Generate questions with Gemini
-        try:
-            questions = generate_questions(video.transcript, count=10, difficulty=difficulty, state=state)
-            print(questions)
-            for q in questions:
-                Question.objects.create(
-                session=session,
-                text=q["text"],
-                options=q["options"],
-                correct_answer=q["correct_answer"],
-                difficulty=q["difficulty"]
-            )
-        except Exception as e:
-            return Response({"error": str(e)}, status=500)
-
-        session.adaptation_level = agent.avg_level(key)
-        session.completed_at = timezone.now()
-        session.is_quiz_generated = True
-        session.is_quiz_submitted = False
-        session.score = 0
-        session.stars = 0
-        session.save()
+        # Serve straight from the question bank when it can, otherwise generate with Gemini in the background
+        questions = draw_quiz(video, difficulty)
+        if questions is None:
+            job = enqueue_quiz_generation(session, difficulty, state, adaptation_level)
+            return Response(QuizGenerationJobSerializer(job).data, status=202)
+
+        save_quiz(session, questions, adaptation_level)
         return Response(QuizSessionSerializer(session).data, status=201)
 
+class QuizGenerationStatusView(views.APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, course_id, video_id):
+        user = request.user
+        job = QuizGenerationJob.objects.filter(
+            session__user=user,
+            session__video__id=video_id,
+            session__video__course__id=course_id,
+        ).order_by("-created_at").first()
+        if job is None:
+            return Response({"error": "Quiz generation job not found"}, status=404)
+        return Response(QuizGenerationJobSerializer(fail_if_stale(job)).data)
+
 class SubmitQuizView(views.APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, course_id, video_id):
         user = request.user
-        session = QuizSession.objects.get(
+        session = QuizSession.objects.select_related("video").get(
             user=user, 
             video__id=video_id, 
             video__course__id=course_id, 
             is_quiz_generated=True
         )
         answers = request.data.get("answers", [])
-        key = f"{session.user.id}_{session.video.course.id}"
-        
-        score = 0
-        states_and_actions = []  # Store state-action pairs for batch update
+        if not answers:
+            return Response({"error": "No answers submitted"}, status=400)
+        if not isinstance(answers, list):
+            return Response({"error": "Answers must be a list"}, status=400)
+        if session.is_quiz_submitted:
+            return Response(QuizSessionSubmitSerializer(session).data)
+        key = make_key(session.user_id, session.video.course_id)
 
-        # First pass: collect all answers and calculate intermediate states
-        current_state = str(agent.avg_level(key))[:4]
-        
-        for i, answer in enumerate(answers):
-            question = Question.objects.get(id=answer["question_id"], session=session)
-            question.selected = str(answer["selected"])
-            question.save()
-
-            reward = 1 if question.selected == question.correct_answer else -1
-            
-            # Store state-action-reward for this step
-            states_and_actions.append({
-                'state': current_state,
-                'action': question.difficulty,
-                'reward': reward
-            })
-            
-            # Temporarily update to get next state
-            agent.update(key, current_state, question.difficulty, reward, current_state)
-            current_state = str(agent.avg_level(key))[:4]
-            
-            score += reward if reward > 0 else 0
-
-        # Second pass: proper Q-learning updates with correct next states
-        for i, sa in enumerate(states_and_actions):
-            if i < len(states_and_actions) - 1:
-                # Use next question's state as next_state
-                next_state = str(agent.avg_level(key))[:4] if i == len(states_and_actions) - 1 else current_state
-            else:
-                # For last question, next_state is final state
-                next_state = current_state
-            
-            agent.update(key, sa['state'], sa['action'], sa['reward'], next_state)
-
-        # Update session with results
-        session.score = (score / len(answers)) * 100
-        session.stars = (score / len(answers)) * 5
-        session.completed_at = timezone.now()
-        session.is_quiz_submitted = True
-        session.save()
+        # Grade every answer in memory against a single fetch of the session's questions
+        questions = session.questions.in_bulk()
+        now = timezone.now()
+        graded = []
+        for answer in answers:
+            try:
+                question_id = int(answer["question_id"])
+                selected = str(answer["selected"])
+            except (TypeError, KeyError, ValueError):
+                selected = None
+            if selected not in ANSWER_CHOICES:
+                return Response({"error": "Each answer needs a question_id and a selected option"}, status=400)
+            question = questions.get(question_id)
+            if question is None:
+                return Response({"error": "Question not found"}, status=400)
+            question.selected = selected
+            question.updated_at = now
+            graded.append(question)
+        score = sum(1 for question in graded if question.is_correct)
+
+        # Mark the session submitted only if no concurrent retry got there first,
+        # then save the answers and learn from the whole quiz in the same transaction
+        with transaction.atomic():
+            submitted = QuizSession.objects.filter(pk=session.pk, is_quiz_submitted=False).update(
+                score=(score / len(answers)) * 100,
+                stars=(score / len(answers)) * 5,
+                completed_at=now,
+                is_quiz_submitted=True,
+                updated_at=now,
+            )
+            if submitted:
+                Question.objects.bulk_update(graded, ["selected", "updated_at"])
+                agent.update_episode(key, [
+                    (question.difficulty, 1 if question.is_correct else -1)
+                    for question in graded
+                ])
+        session.refresh_from_db()
 
         return Response(QuizSessionSubmitSerializer(session).data)
 
@@ -140,25 +184,24 @@ class CourseOverviewView(views.APIView):
 
     def get(self, request, course_id):
         user = request.user
-        course = Course.objects.get(id=course_id)
+        course = Course.objects.with_user_progress(user).get(id=course_id)
         sessions = QuizSession.objects.filter(
             user=user, video__course=course, completed_at__isnull=False
-        )
-        video_count = course.videos.count()
+        ).prefetch_related("questions")
         completed_video_ids = {s.video_id for s in sessions}
 
         total_stars = sum(s.stars for s in sessions)
         avg_score = sum(s.score for s in sessions) / max(len(sessions), 1)
-        progress = course.progress_percentage(user)
+        progress = course.completed_video_count / course.video_count if course.video_count else 0
         
-        ai_level = get_ai_level(agent.avg_level(f"{user.id}_{course_id}"))
+        ai_level = get_ai_level(agent.avg_level(make_key(user.id, course_id)))
 
         return Response({
             "course_id": course_id,
             "title": course.title,
             "description": course.description,
-            "total_videos": course.total_videos,
-            "videos": VideoSerializer(course.videos.all(), many=True, context={"request": request}).data,
+            "total_videos": course.video_count,
+            "videos": VideoSerializer(course.videos.with_user_status(user), many=True, context={"request": request}).data,
             "stats": {
                 "stars": total_stars,
                 "avgScore": round(avg_score, 2),
@@ -197,81 +240,28 @@ class DashboardInfoView(views.APIView):
 
     def get(self, request):
         user = request.user
-        total_stars = QuizSession.objects.filter(user=user, stars__gt=0).aggregate(total_stars=Sum('stars'))['total_stars']
-        quizzes_completed = QuizSession.objects.filter(user=user, is_quiz_submitted=True).count()
-        average_score = QuizSession.objects.filter(user=user, is_quiz_submitted=True).aggregate(average_score=Avg('score'))['average_score']
+        stats = get_user_stats(user)
+        courses = list(Course.objects.with_user_progress(user))
+        completed_course_ids = {course.id for course in courses if course.is_completed}
+
+        started_courses = [
+            course for course in courses
+            if course.is_started and course.id not in completed_course_ids
+        ]
+        started_courses = CourseSerializer(started_courses, many=True, context={"request": request}).data
+
+        sessions = get_recent_sessions(user)
+        keys = [make_key(user.id, course_id) for course_id in get_recent_course_ids(sessions)]
+        # A user without sessions has no levels to average
+        adaptation_level = get_ai_level(float(agent.avg_levels(keys).mean())) if keys else "Beginner"
+
+        activities = build_activities(sessions, completed_course_ids)
 
-        started_courses = []
-        for course in Course.objects.all():
-            if course.is_course_started_by_user(user) and not course.is_course_completed_by_user(user):
-                started_courses.append(CourseSerializer(course, context={"request": request}).data)
-        
-        activities = []
-        activitie_id = 1
-        max_activities = 5
-        course_ids = []
-        courses = QuizSession.objects.filter(user=user).order_by("-updated_at")
-        adaptation_level = []
-        
-        try:
-            for course in courses:
-                if course.video.course.id not in course_ids:
-                    course_ids.append(course.video.course.id)
-                    adaptation_level.append(agent.avg_level(f"{user.id}_{course.video.course.id}"))
-                else:
-                    continue
-            adaptation_level = get_ai_level(sum(adaptation_level) / len(adaptation_level))
-        except Exception as e:
-            print(e)
-            adaptation_level = "Beginner"
-    
-        course_ids = []
-        for cs in courses:
-            if cs.video.course.id not in course_ids:
-                course_ids.append(cs.video.course.id)
-                course = Course.objects.get(id=cs.video.course.id)
-            else:
-                continue
-            if len(activities) >= max_activities:
-                break
-            if course.is_course_completed_by_user(user):
-                activities.append({
-                    "id": activitie_id,
-                    "type": "course_completed",
-                    "title": course.title,
-                    "description": "Completed course",
-                    "date": QuizSession.objects.filter(user=user, video__course=course, completed_at__isnull=False, is_quiz_submitted=True).order_by("-updated_at").first().updated_at
-                })
-                activitie_id += 1
-            quiz_sessions = QuizSession.objects.filter(user=user, video__course=course, completed_at__isnull=False, is_quiz_submitted=True).order_by("-completed_at")
-            for quiz_session in quiz_sessions:
-                if len(activities) >= max_activities:
-                    break
-                if quiz_session.stars > 0:
-                    if len(activities) >= max_activities:
-                        break
-                    activities.append({
-                        "id": activitie_id,
-                        "type": "reward_received",
-                        "title": quiz_session.video.title + " - " + course.title,
-                        "description": "Received reward",
-                        "date": quiz_session.updated_at
-                    })
-                    activitie_id += 1
-                activities.append({
-                    "id": activitie_id,
-                    "type": "quiz_completed",
-                    "title": quiz_session.video.title + " - " + course.title,
-                    "description": "Completed quiz",
-                    "date": quiz_session.completed_at
-                })
-                activitie_id += 1
-        
         res = {
             "stats": {
-                "quizzesCompleted": quizzes_completed,
-                "averageScore": round(average_score, 2) if average_score else 0,
-                "totalStars": total_stars,
+                "quizzesCompleted": stats["quizzes_completed"],
+                "averageScore": round(stats["average_score"], 2) if stats["average_score"] else 0,
+                "totalStars": stats["total_stars"],
                 "adaptationLevel": adaptation_level
             },
             "startedCourses": started_courses,
@@ -283,14 +273,22 @@ class QTableViewOverall(views.APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-        all_tables = []
-        for course in Course.objects.all():
-            q_table = agent.export_qtable(f"{user.id}_{course.id}")
-            if len(q_table) > 0:
-                all_tables.append({
-                    "course_id": course.id,
-                    "title": course.title,
-                    "q_table": q_table
+        tables = agent.get_user_qtables(request.user.id)
+        courses = Course.objects.in_bulk(list(tables))
+
+        def stream():
+            yield "["
+            first = True
+            for course_id in sorted(tables):
+                q_table = tables[course_id]
+                if course_id not in courses or len(q_table) == 0:
+                    continue
+                yield ("" if first else ",") + json.dumps({
+                    "course_id": course_id,
+                    "title": courses[course_id].title,
+                    "q_table": q_table.export()
                 })
-        return Response(all_tables)
\ No newline at end of file
+                first = False
+            yield "]"
+
+        return StreamingHttpResponse(stream(), content_type="application/json")
@@ -12,6 +12,9 @@ export const startVideoSession = (courseId, videoId) =>
 export const generateQuiz = (courseId, videoId) => 
     AXIOS_INSTANCE.post(`/core/course/${courseId}/videos/${videoId}/complete/`);
 
+export const getQuizGenerationStatus = (courseId, videoId) => 
+    AXIOS_INSTANCE.get(`/core/course/${courseId}/videos/${videoId}/complete/status/`);
+
 export const getQuizSession = (courseId, videoId) => 
     FOG_AXIOS_INSTANCE.get(`/course/${courseId}/videos/${videoId}/quiz`);
 
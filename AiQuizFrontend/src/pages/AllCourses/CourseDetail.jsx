@@ -7,7 +7,11 @@ import { useNavigate, useParams } from 'react-router-dom'
 import { Dialog, DialogContent, DialogHeader, DialogTitle, DialogFooter } from '@/components/ui/dialog'
 import PageContainer from '@/components/layout/pageContainer'
 import YouTube from 'react-youtube'
-import { getSpecificCourse, startVideoSession, generateQuiz } from '@/apis/courses'
+import { getSpecificCourse, startVideoSession, generateQuiz, getQuizGenerationStatus } from '@/apis/courses'
+
+// Poll the quiz generation status every 2s, for at most 3 minutes
+const QUIZ_POLL_INTERVAL = 2000
+const QUIZ_POLL_MAX_ATTEMPTS = 90
 
 const statusIcon = {
   completed: '✅',
@@ -101,12 +105,37 @@ const CourseDetail = () => {
     playerRef.current = null
   }
 
+  const openQuiz = () => {
+    setQuizLoading(false)
+    navigate(`/courses/${courseId}/videos/${currentVideo.id}/quiz`)
+  }
+
+  // 202 means the quiz is being generated in the background; poll until the job finishes
+  const waitForQuiz = (attempt = 1) => {
+    const fail = () => {
+      setQuizLoading(false)
+      setError('Failed to generate quiz. Please try again.')
+    }
+    getQuizGenerationStatus(courseId, currentVideo.id).then(res => {
+      if (res.data.status === 'completed') {
+        openQuiz()
+      } else if (res.data.status === 'failed' || attempt >= QUIZ_POLL_MAX_ATTEMPTS) {
+        fail()
+      } else {
+        setTimeout(() => waitForQuiz(attempt + 1), QUIZ_POLL_INTERVAL)
+      }
+    }).catch(fail)
+  }
+
   const handleQuiz = () => {
     setQuizLoading(true)
     generateQuiz(courseId, currentVideo.id).then(res => {
       console.log(res)
-      setQuizLoading(false)
-      navigate(`/courses/${courseId}/videos/${currentVideo.id}/quiz`)
+      if (res.status === 202) {
+        setTimeout(waitForQuiz, QUIZ_POLL_INTERVAL)
+      } else {
+        openQuiz()
+      }
     })
   }
 
@@ -1,15 +1,53 @@
-import time
 import logging
 from flask import Flask, jsonify, request, render_template_string
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from flask_cors import CORS
+from cache import ResponseCache, SingleFlight
+from auth import get_user_id, user_cache_key
+from catalog import CATALOG_TREE_KEY, merge_catalog
+from settings import (
+    DJANGO_BASE, PORT, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_SWEEP_INTERVAL, CACHE_STALE_SECONDS,
+    UPSTREAM_CONNECT_TIMEOUT, UPSTREAM_READ_TIMEOUT, UPSTREAM_POOL_SIZE, UPSTREAM_RETRIES, UPSTREAM_BACKOFF,
+    UPSTREAM_RETRY_STATUSES,
+)
 
 app = Flask(__name__)
 CORS(app)
 
-DJANGO_BASE = "http://localhost:8000/api/core"
+def create_upstream_session():
+    """A keep-alive session to Django that retries idempotent GETs with exponential backoff.
+
+    Connection failures and 502/503/504 responses are retried. Read timeouts are not, so a stalled
+    origin costs one read timeout rather than several.
+    """
+    retry = Retry(
+        total=UPSTREAM_RETRIES,
+        read=False,
+        backoff_factor=UPSTREAM_BACKOFF,
+        status_forcelist=UPSTREAM_RETRY_STATUSES,
+        allowed_methods=["GET"],
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=UPSTREAM_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+UPSTREAM = create_upstream_session()
+
+CACHE = ResponseCache(
+    max_entries=CACHE_MAX_ENTRIES,
+    max_bytes=CACHE_MAX_BYTES,
+    sweep_interval=CACHE_SWEEP_INTERVAL,
+    stale_timeout=CACHE_STALE_SECONDS,
+)
+CACHE.start_sweeper()
 
-CACHE = {}
+# Upstream fetches in progress, one per cache key
+INFLIGHT = SingleFlight()
 
 logging.basicConfig(
     level=logging.INFO,
@@ -21,15 +59,18 @@ logging.basicConfig(
 )
 
 def get_cache(key):
-    entry = CACHE.get(key)
-    if entry and (time.time() - entry['time'] < entry['cache_timeout']):
+    """Return (data, fresh) from the cache; stale data is still returned, with fresh=False."""
+    data, fresh = CACHE.lookup(key)
+    if data is None:
+        logging.info(f"Cache miss for key: {key}")
+    elif fresh:
         logging.info(f"Cache hit for key: {key}")
-        return entry['data']
-    logging.info(f"Cache miss for key: {key}")
-    return None
+    else:
+        logging.info(f"Stale cache hit for key: {key}")
+    return data, fresh
 
 def set_cache(key, data, cache_timeout):
-    CACHE[key] = {'data': data, 'time': time.time(), 'cache_timeout': cache_timeout}
+    CACHE.set(key, data, cache_timeout)
     logging.info(f"Cache set for key: {key}")
 
 def get_auth_headers():
@@ -38,30 +79,64 @@ def get_auth_headers():
         headers['Authorization'] = request.headers['Authorization']
     return headers
 
-def proxy_get(path, use_cache=False, cache_key=None, cache_timeout=60):
-    if use_cache and cache_key:
-        cached = get_cache(cache_key)
-        if cached:
-            return jsonify(cached), 200
-
+def fetch_upstream(path, headers):
+    """GET a Django API path and return (data, status_code). Raises requests.RequestException."""
+    full_url = f"{DJANGO_BASE}{path}"
+    logging.info(f"Fetching from Django API: {full_url}")
+    response = UPSTREAM.get(full_url, headers=headers, timeout=(UPSTREAM_CONNECT_TIMEOUT, UPSTREAM_READ_TIMEOUT))
+    if response.ok:
+        return response.json(), response.status_code
+    logging.warning(f"Django API error - {path} - Status: {response.status_code}")
+    return {"error": "Failed to fetch data", "status": response.status_code}, response.status_code
+
+def fetch_and_cache(path, headers, cache_key, cache_timeout):
+    data, status = fetch_upstream(path, headers)
+    if status < 300:
+        set_cache(cache_key, data, cache_timeout)
+    return data, status
+
+def cached_get(path, cache_key, cache_timeout):
+    """(data, status_code) of a Django API path, through the cache. Raises requests.RequestException."""
+    headers = get_auth_headers()
+    cached, fresh = get_cache(cache_key)
+    if cached is not None:
+        # Stale-while-revalidate: answer now, refresh once in the background
+        if not fresh:
+            INFLIGHT.do_in_background(cache_key, lambda: fetch_and_cache(path, headers, cache_key, cache_timeout))
+        return cached, 200
+
+    # Concurrent misses for a key wait for a single upstream fetch
+    return INFLIGHT.do(cache_key, lambda: fetch_and_cache(path, headers, cache_key, cache_timeout))
+
+def upstream_response(path, fetch):
+    """Turn fetch() -> (data, status_code), or the upstream error it raises, into a response."""
     try:
-        full_url = f"{DJANGO_BASE}{path}"
-        logging.info(f"Fetching from Django API: {full_url}")
-        response = requests.get(full_url, headers=get_auth_headers())
-
-        if response.ok:
-            data = response.json()
-            if use_cache and cache_key:
-                set_cache(cache_key, data, cache_timeout)
-            return jsonify(data), response.status_code
-        else:
-            logging.warning(f"Django API error - {path} - Status: {response.status_code}")
-            return jsonify({"error": "Failed to fetch data", "status": response.status_code}), response.status_code
+        data, status = fetch()
+        return jsonify(data), status
+
+    except requests.Timeout as e:
+        logging.error(f"Timeout on {path}: {str(e)}")
+        return jsonify({"error": "Upstream timed out"}), 504
 
     except requests.RequestException as e:
         logging.error(f"Request error on {path}: {str(e)}")
         return jsonify({"error": "Internal server error"}), 500
 
+def proxy_get(path, use_cache=False, cache_key=None, cache_timeout=60):
+    if use_cache and cache_key:
+        return upstream_response(path, lambda: cached_get(path, cache_key, cache_timeout))
+    return upstream_response(path, lambda: fetch_upstream(path, get_auth_headers()))
+
+def fetch_catalog(cache_timeout):
+    """The catalog as the shared tree merged with the user's cached progress overlay."""
+    tree, status = cached_get("/catalog/tree/", CATALOG_TREE_KEY, cache_timeout)
+    if status >= 300:
+        return tree, status
+    progress, status = cached_get("/catalog/progress/", get_user_cache_key('catalog_progress'), cache_timeout)
+    if status >= 300:
+        return progress, status
+    return merge_catalog(tree, progress), 200
+
 @app.route('/total-stars', methods=['GET'])
 def total_stars():
     return proxy_get("/total-stars", use_cache=True, cache_key=get_user_cache_key('total_stars'), cache_timeout=100)
@@ -72,7 +147,10 @@ def dashboard_info():
 
 @app.route('/catalog', methods=['GET'])
 def catalog():
-    return proxy_get("/catalog", use_cache=True, cache_key=get_user_cache_key('catalog'), cache_timeout=600)
+    # The split catalog is only served to verified users; others get the whole catalog per token
+    if get_user_id(request.headers.get('Authorization')) is None:
+        return proxy_get("/catalog", use_cache=True, cache_key=get_user_cache_key('catalog'), cache_timeout=600)
+    return upstream_response("/catalog", lambda: fetch_catalog(cache_timeout=600))
 
 @app.route('/course/<int:course_id>/videos/<int:video_id>/quiz', methods=['GET'])
 def quiz_detail(course_id, video_id):
@@ -85,16 +163,8 @@ def q_table_overall():
 @app.route('/')
 def analysis():
     # Cache stats
-    now = time.time()
-    cache_stats = [
-        {
-            'key': k,
-            'age': round(now - v['time'], 2),
-            'timeout': v['cache_timeout'],
-            'expires_in': round(v['cache_timeout'] - (now - v['time']), 2)
-        }
-        for k, v in CACHE.items()
-    ]
+    cache_stats = CACHE.stats()
+    inflight_stats = INFLIGHT.stats()
     # Log tail
     try:
         with open('fog_node.log', 'r') as f:
@@ -108,27 +178,31 @@ def analysis():
         <h1>Fog Node Analysis</h1>
         <h2>Cache Stats</h2>
         <table border="1" cellpadding="5" style="border-collapse:collapse;">
-            <tr><th>Key</th><th>Age (s)</th><th>Timeout (s)</th><th>Expires In (s)</th></tr>
-            {% for entry in cache_stats %}
-            <tr>
-                <td>{{ entry.key }}</td>
-                <td>{{ entry.age }}</td>
-                <td>{{ entry.timeout }}</td>
-                <td>{{ entry.expires_in }}</td>
-            </tr>
-            {% endfor %}
+            <tr><th>Entries</th><td>{{ cache_stats.entries }} / {{ cache_stats.max_entries }}</td></tr>
+            <tr><th>Size (bytes)</th><td>{{ cache_stats.bytes }} / {{ cache_stats.max_bytes }}</td></tr>
+            <tr><th>Hits</th><td>{{ cache_stats.hits }}</td></tr>
+            <tr><th>Stale Hits</th><td>{{ cache_stats.stale_hits }}</td></tr>
+            <tr><th>Misses</th><td>{{ cache_stats.misses }}</td></tr>
+            <tr><th>Hit Rate (%)</th><td>{{ cache_stats.hit_rate }}</td></tr>
+            <tr><th>Evictions</th><td>{{ cache_stats.evictions }}</td></tr>
+            <tr><th>Expirations</th><td>{{ cache_stats.expirations }}</td></tr>
+        </table>
+        <h2>Upstream Fetches</h2>
+        <table border="1" cellpadding="5" style="border-collapse:collapse;">
+            <tr><th>Fetches</th><td>{{ inflight_stats.calls }}</td></tr>
+            <tr><th>Coalesced Requests</th><td>{{ inflight_stats.shared }}</td></tr>
+            <tr><th>In Flight</th><td>{{ inflight_stats.in_flight }}</td></tr>
         </table>
         <h2>Recent Log Entries</h2>
         <pre style="background:#222; color:#eee; padding:10px; border-radius:5px;">{{ log|safe }}</pre>
     </body>
     </html>
     '''
-    return render_template_string(html, cache_stats=cache_stats, log=''.join(log_lines))
+    return render_template_string(html, cache_stats=cache_stats, inflight_stats=inflight_stats, log=''.join(log_lines))
 
 def get_user_cache_key(base_key):
-    auth = request.headers.get('Authorization', '')
-    return f'{base_key}:{auth}'
+    return user_cache_key(base_key, request.headers.get('Authorization', ''))
 
 if __name__ == '__main__':
-    logging.info("Starting Flask Fog Node on port 5000")
-    app.run(host='0.0.0.0', port=5000)
+    logging.info(f"Starting Flask Fog Node on port {PORT}")
+    app.run(host='0.0.0.0', port=PORT)
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import aiohttp
+from aiohttp import web
+from cache import ResponseCache, AsyncSingleFlight
+from auth import get_user_id, user_cache_key
+from catalog import CATALOG_TREE_KEY, merge_catalog
+from settings import (
+    DJANGO_BASE, PORT, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES, CACHE_SWEEP_INTERVAL, CACHE_STALE_SECONDS,
+    UPSTREAM_CONNECT_TIMEOUT, UPSTREAM_READ_TIMEOUT, UPSTREAM_POOL_SIZE, UPSTREAM_RETRIES, UPSTREAM_BACKOFF,
+    UPSTREAM_RETRY_STATUSES,
+)
+
+# Asyncio serving mode of the fog node: the same routes as app.py, served by aiohttp on one event
+# loop. Waiting on Django does not hold a thread, so one process can keep thousands of client
+# connections open. Run with `python async_app.py` instead of `python app.py`.
+
+# The cache is only touched from the event loop and the sweeper thread, and its methods take its
+# lock, so coroutines never see a half-updated entry. The upstream fetch is awaited between a miss
+# and the matching set; INFLIGHT covers that gap, so concurrent misses for a key fetch it once.
+CACHE = ResponseCache(
+    max_entries=CACHE_MAX_ENTRIES,
+    max_bytes=CACHE_MAX_BYTES,
+    sweep_interval=CACHE_SWEEP_INTERVAL,
+    stale_timeout=CACHE_STALE_SECONDS,
+)
+
+# Upstream fetches in progress, one per cache key
+INFLIGHT = AsyncSingleFlight()
+
+UPSTREAM = web.AppKey("upstream", aiohttp.ClientSession)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    handlers=[
+        logging.FileHandler("fog_node.log"),
+        logging.StreamHandler()
+    ]
+)
+
+def get_cache(key):
+    """Return (data, fresh) from the cache; stale data is still returned, with fresh=False."""
+    data, fresh = CACHE.lookup(key)
+    if data is None:
+        logging.info(f"Cache miss for key: {key}")
+    elif fresh:
+        logging.info(f"Cache hit for key: {key}")
+    else:
+        logging.info(f"Stale cache hit for key: {key}")
+    return data, fresh
+
+def set_cache(key, data, cache_timeout):
+    CACHE.set(key, data, cache_timeout)
+    logging.info(f"Cache set for key: {key}")
+
+def get_auth_headers(request):
+    headers = {}
+    if 'Authorization' in request.headers:
+        headers['Authorization'] = request.headers['Authorization']
+    return headers
+
+def get_user_cache_key(request, base_key):
+    return user_cache_key(base_key, request.headers.get('Authorization', ''))
+
+async def fetch_upstream(session, path, headers):
+    """GET a Django API path and return (data, status_code).
+
+    Connection failures and 502/503/504 responses are retried with exponential backoff. Timeouts
+    are not, so a stalled origin costs one timeout. Raises aiohttp.ClientError or asyncio.TimeoutError.
+    """
+    full_url = f"{DJANGO_BASE}{path}"
+    for attempt in range(UPSTREAM_RETRIES + 1):
+        retry = attempt < UPSTREAM_RETRIES
+        logging.info(f"Fetching from Django API: {full_url}")
+        try:
+            async with session.get(full_url, headers=headers) as response:
+                if response.status in UPSTREAM_RETRY_STATUSES and retry:
+                    logging.warning(f"Django API error - {path} - Status: {response.status}, retrying")
+                elif response.ok:
+                    return await response.json(), response.status
+                else:
+                    logging.warning(f"Django API error - {path} - Status: {response.status}")
+                    return {"error": "Failed to fetch data", "status": response.status}, response.status
+        except asyncio.TimeoutError:
+            raise
+        except aiohttp.ClientConnectionError as e:
+            if not retry:
+                raise
+            logging.warning(f"Connection error on {path}: {str(e)}, retrying")
+        await asyncio.sleep(UPSTREAM_BACKOFF * 2 ** attempt)
+
+async def fetch_and_cache(session, path, headers, cache_key, cache_timeout):
+    data, status = await fetch_upstream(session, path, headers)
+    if status < 300:
+        set_cache(cache_key, data, cache_timeout)
+    return data, status
+
+async def cached_get(request, path, cache_key, cache_timeout):
+    """(data, status_code) of a Django API path, through the cache. Raises aiohttp.ClientError or asyncio.TimeoutError."""
+    session = request.app[UPSTREAM]
+    headers = get_auth_headers(request)
+    cached, fresh = get_cache(cache_key)
+    if cached is not None:
+        # Stale-while-revalidate: answer now, refresh once in the background
+        if not fresh:
+            INFLIGHT.do_in_background(cache_key, lambda: fetch_and_cache(session, path, headers, cache_key, cache_timeout))
+        return cached, 200
+
+    # Concurrent misses for a key wait for a single upstream fetch
+    return await INFLIGHT.do(cache_key, lambda: fetch_and_cache(session, path, headers, cache_key, cache_timeout))
+
+async def upstream_response(path, fetch):
+    """Turn await fetch() -> (data, status_code), or the upstream error it raises, into a response."""
+    try:
+        data, status = await fetch()
+        return web.json_response(data, status=status)
+
+    except asyncio.TimeoutError as e:
+        logging.error(f"Timeout on {path}: {str(e)}")
+        return web.json_response({"error": "Upstream timed out"}, status=504)
+
+    except aiohttp.ClientError as e:
+        logging.error(f"Request error on {path}: {str(e)}")
+        return web.json_response({"error": "Internal server error"}, status=500)
+
+async def proxy_get(request, path, cache_key=None, cache_timeout=60):
+    if cache_key:
+        return await upstream_response(path, lambda: cached_get(request, path, cache_key, cache_timeout))
+    return await upstream_response(path, lambda: fetch_upstream(request.app[UPSTREAM], path, get_auth_headers(request)))
+
+async def fetch_catalog(request, cache_timeout):
+    """The catalog as the shared tree merged with the user's cached progress overlay."""
+    (tree, tree_status), (progress, progress_status) = await asyncio.gather(
+        cached_get(request, "/catalog/tree/", CATALOG_TREE_KEY, cache_timeout),
+        cached_get(request, "/catalog/progress/", get_user_cache_key(request, 'catalog_progress'), cache_timeout),
+    )
+    if tree_status >= 300:
+        return tree, tree_status
+    if progress_status >= 300:
+        return progress, progress_status
+    return merge_catalog(tree, progress), 200
+
+routes = web.RouteTableDef()
+
+@routes.get('/total-stars')
+async def total_stars(request):
+    return await proxy_get(request, "/total-stars", cache_key=get_user_cache_key(request, 'total_stars'), cache_timeout=100)
+
+@routes.get('/dashboard-info')
+async def dashboard_info(request):
+    return await proxy_get(request, "/dashboard-info", cache_key=get_user_cache_key(request, 'dashboard_info'), cache_timeout=120)
+
+@routes.get('/catalog')
+async def catalog(request):
+    # The split catalog is only served to verified users; others get the whole catalog per token
+    if get_user_id(request.headers.get('Authorization')) is None:
+        return await proxy_get(request, "/catalog", cache_key=get_user_cache_key(request, 'catalog'), cache_timeout=600)
+    return await upstream_response("/catalog", lambda: fetch_catalog(request, cache_timeout=600))
+
+@routes.get(r'/course/{course_id:\d+}/videos/{video_id:\d+}/quiz')
+async def quiz_detail(request):
+    course_id = request.match_info['course_id']
+    video_id = request.match_info['video_id']
+    return await proxy_get(request, f"/course/{course_id}/videos/{video_id}/quiz", cache_key=get_user_cache_key(request, f'quiz_detail_{course_id}_{video_id}'), cache_timeout=300)
+
+@routes.get('/q-table/overall')
+async def q_table_overall(request):
+    return await proxy_get(request, "/q-table/overall", cache_key=get_user_cache_key(request, 'q_table_overall'), cache_timeout=600)
+
+@routes.get('/')
+async def analysis(request):
+    return web.json_response({"cache": CACHE.stats(), "upstream_fetches": INFLIGHT.stats()})
+
+@web.middleware
+async def cors(request, handler):
+    """Allow any origin, like flask_cors' defaults in app.py, including preflight requests."""
+    if request.method == 'OPTIONS' and 'Access-Control-Request-Method' in request.headers:
+        response = web.Response()
+        response.headers['Access-Control-Allow-Methods'] = 'GET, OPTIONS'
+        if 'Access-Control-Request-Headers' in request.headers:
+            response.headers['Access-Control-Allow-Headers'] = request.headers['Access-Control-Request-Headers']
+    else:
+        response = await handler(request)
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
+
+async def upstream_session(app):
+    """One keep-alive connection pool to Django for the lifetime of the app."""
+    timeout = aiohttp.ClientTimeout(sock_connect=UPSTREAM_CONNECT_TIMEOUT, sock_read=UPSTREAM_READ_TIMEOUT)
+    connector = aiohttp.TCPConnector(limit=UPSTREAM_POOL_SIZE)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        app[UPSTREAM] = session
+        yield
+
+def create_app():
+    app = web.Application(middlewares=[cors])
+    app.add_routes(routes)
+    app.cleanup_ctx.append(upstream_session)
+    CACHE.start_sweeper()
+    return app
+
+if __name__ == '__main__':
+    logging.info(f"Starting async Fog Node on port {PORT}")
+    web.run_app(create_app(), host='0.0.0.0', port=PORT, print=None)
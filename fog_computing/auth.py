@@ -0,0 +1,31 @@
+import jwt
+from settings import JWT_SECRET, JWT_ALGORITHM, JWT_USER_ID_CLAIM
+
+
+def get_user_id(authorization):
+    """The user id of a valid 'Bearer <access token>' Authorization header, or None.
+
+    The signature and expiry are checked locally with the Django signing key, so a forged or
+    expired token never maps to a user's cached data. Always None when JWT_SECRET is unset.
+    """
+    if not JWT_SECRET or not authorization:
+        return None
+    scheme, _, token = authorization.partition(' ')
+    if scheme != 'Bearer' or not token:
+        return None
+    try:
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    except jwt.InvalidTokenError:
+        return None
+    if payload.get('token_type', 'access') != 'access':
+        return None
+    return payload.get(JWT_USER_ID_CLAIM)
+
+
+def user_cache_key(base_key, authorization):
+    """Cache key of per-user data: by user id, so a refreshed token still hits the user's entries."""
+    user_id = get_user_id(authorization)
+    if user_id is not None:
+        return f'{base_key}:user:{user_id}'
+    # Without a verifiable token, fall back to one entry per Authorization header
+    return f'{base_key}:{authorization or ""}'
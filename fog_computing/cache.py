@@ -0,0 +1,236 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResponseCache:
+    """Bounded in-memory cache of API responses with per-entry TTL and LRU eviction.
+
+    The cache holds at most `max_entries` entries and `max_bytes` of JSON-encoded data. When
+    either limit is exceeded, the least recently used entries are evicted first. An entry is fresh
+    for its `cache_timeout`, then stays available to lookup() as stale for `stale_timeout` more
+    seconds so it can be served while it is refreshed. Entries past that are dropped when they are
+    read, and by the background sweeper started with start_sweeper().
+    """
+
+    def __init__(self, max_entries=1000, max_bytes=50 * 1024 * 1024, sweep_interval=30, stale_timeout=60):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.stale_timeout = stale_timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._sweeper = None
+        self.bytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Return the cached data for `key`, or None if it is missing or no longer fresh."""
+        data, fresh = self.lookup(key)
+        return data if fresh else None
+
+    def lookup(self, key):
+        """Return (data, fresh) for `key`: fresh or stale data, or (None, False) if there is none."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, False
+            age = time.time() - entry['time']
+            if age >= entry['cache_timeout'] + entry['stale_timeout']:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None, False
+            self._entries.move_to_end(key)
+            if age >= entry['cache_timeout']:
+                self.stale_hits += 1
+                return entry['data'], False
+            self.hits += 1
+            return entry['data'], True
+
+    def set(self, key, data, cache_timeout, stale_timeout=None):
+        if stale_timeout is None:
+            stale_timeout = self.stale_timeout
+        size = len(json.dumps(data))
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                logging.warning(f"Not caching {key}: {size} bytes is over the cache limit")
+                return
+            self._entries[key] = {
+                'data': data,
+                'time': time.time(),
+                'cache_timeout': cache_timeout,
+                'stale_timeout': stale_timeout,
+                'size': size,
+            }
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.bytes -= entry['size']
+
+    def sweep(self):
+        """Drop every entry past its stale window and return how many were dropped."""
+        now = time.time()
+        with self._lock:
+            expired = [
+                key for key, entry in self._entries.items()
+                if now - entry['time'] >= entry['cache_timeout'] + entry['stale_timeout']
+            ]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+        return len(expired)
+
+    def start_sweeper(self):
+        """Run sweep() every `sweep_interval` seconds in a daemon thread."""
+        if self._sweeper is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(self.sweep_interval)
+                swept = self.sweep()
+                if swept:
+                    logging.info(f"Cache sweeper removed {swept} expired entries")
+
+        self._sweeper = threading.Thread(target=run, name="cache-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.stale_hits) / lookups * 100, 1) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time; concurrent callers for the key share its result."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shared = 0
+
+    def do(self, key, fn):
+        """Call fn() unless a call for `key` is already running, in which case wait for its result.
+
+        An exception raised by fn() is re-raised in every caller that waited on it.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {'done': threading.Event(), 'result': None, 'error': None}
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+
+        try:
+            call['result'] = fn()
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call['done'].set()
+        return call['result']
+
+    def do_in_background(self, key, fn):
+        """Start do(key, fn) in a daemon thread unless a call for `key` is already running."""
+        with self._lock:
+            if key in self._calls:
+                return False
+
+        def run():
+            try:
+                self.do(key, fn)
+            except Exception as e:
+                logging.error(f"Background refresh of {key} failed: {e}")
+
+        threading.Thread(target=run, daemon=True).start()
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {'in_flight': len(self._calls), 'calls': self.calls, 'shared': self.shared}
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines running on one event loop.
+
+    The shared call runs as its own task, so a caller that is cancelled (for example because its
+    client disconnected) does not cancel the fetch the other callers are waiting on.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.calls = 0
+        self.shared = 0
+
+    def _start(self, key, fn):
+        task = asyncio.ensure_future(fn())
+        self._calls[key] = task
+        self.calls += 1
+        task.add_done_callback(lambda _: self._calls.pop(key, None))
+        return task
+
+    async def do(self, key, fn):
+        """Await fn() unless a call for `key` is already running, in which case await its result."""
+        task = self._calls.get(key)
+        if task is None:
+            task = self._start(key, fn)
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def do_in_background(self, key, fn):
+        """Start fn() as a task unless a call for `key` is already running."""
+        if key in self._calls:
+            return False
+
+        def log_error(task):
+            if not task.cancelled() and task.exception() is not None:
+                logging.error(f"Background refresh of {key} failed: {task.exception()}")
+
+        self._start(key, fn).add_done_callback(log_error)
+        return True
+
+    def stats(self):
+        return {'in_flight': len(self._calls), 'calls': self.calls, 'shared': self.shared}
@@ -0,0 +1,20 @@
+# The catalog is cached in two parts: the category/course tree from /catalog/tree/, shared by all
+# users, and each user's progress overlay from /catalog/progress/, which only lists started courses.
+
+CATALOG_TREE_KEY = 'catalog_tree'
+
+NOT_STARTED = {'progress': 0, 'is_course_started': False, 'is_course_completed': False}
+
+
+def merge_catalog(tree, progress):
+    """The /catalog payload: the shared tree with the user's progress fields filled in per course."""
+    return [
+        {
+            **category,
+            'courses': [
+                {**course, **progress.get(str(course['id']), NOT_STARTED)}
+                for course in category['courses']
+            ],
+        }
+        for category in tree
+    ]
@@ -0,0 +1,24 @@
+import os
+
+DJANGO_BASE = os.environ.get("FOG_DJANGO_BASE", "http://localhost:8000/api/core")
+PORT = int(os.environ.get("FOG_PORT", 5000))
+
+# Response cache
+CACHE_MAX_ENTRIES = int(os.environ.get("FOG_CACHE_MAX_ENTRIES", 1000))
+CACHE_MAX_BYTES = int(os.environ.get("FOG_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+CACHE_SWEEP_INTERVAL = int(os.environ.get("FOG_CACHE_SWEEP_INTERVAL", 30))
+CACHE_STALE_SECONDS = int(os.environ.get("FOG_CACHE_STALE_SECONDS", 60))
+
+# Calls to Django: timeouts in seconds, connection pool size, and retries of failed GETs
+UPSTREAM_CONNECT_TIMEOUT = float(os.environ.get("FOG_UPSTREAM_CONNECT_TIMEOUT", 3.05))
+UPSTREAM_READ_TIMEOUT = float(os.environ.get("FOG_UPSTREAM_READ_TIMEOUT", 10))
+UPSTREAM_POOL_SIZE = int(os.environ.get("FOG_UPSTREAM_POOL_SIZE", 20))
+UPSTREAM_RETRIES = int(os.environ.get("FOG_UPSTREAM_RETRIES", 2))
+UPSTREAM_BACKOFF = float(os.environ.get("FOG_UPSTREAM_BACKOFF", 0.2))
+UPSTREAM_RETRY_STATUSES = (502, 503, 504)
+
+# JWT verification, to key cached per-user data by user id instead of by token. Must match the
+# Django SIMPLE_JWT signing key (its SECRET_KEY); when unset, per-user entries are keyed by token.
+JWT_SECRET = os.environ.get("FOG_JWT_SECRET", "")
+JWT_ALGORITHM = os.environ.get("FOG_JWT_ALGORITHM", "HS256")
+JWT_USER_ID_CLAIM = os.environ.get("FOG_JWT_USER_ID_CLAIM", "user_id")
@@ -0,0 +1,221 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest import mock
+import jwt
+import auth
+from auth import user_cache_key
+from cache import ResponseCache, SingleFlight, AsyncSingleFlight
+from catalog import merge_catalog, NOT_STARTED
+
+# Run from this directory: python -m unittest tests
+
+
+class ResponseCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch('cache.time.time', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = ResponseCache(max_entries=2)
+        cache.set('a', 1, 60)
+        cache.set('b', 2, 60)
+        cache.get('a')
+        cache.set('c', 3, 60)
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), (1, None, 3))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_byte_limit(self):
+        cache = ResponseCache(max_bytes=20)
+        cache.set('a', 'x' * 10, 60)
+        cache.set('b', 'y' * 10, 60)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('b'), 'y' * 10)
+        self.assertEqual(cache.bytes, 12)
+        # An entry over the whole limit is not cached at all
+        cache.set('c', 'z' * 30, 60)
+        self.assertIsNone(cache.get('c'))
+        self.assertEqual(cache.get('b'), 'y' * 10)
+
+    def test_fresh_then_stale_then_expired(self):
+        cache = ResponseCache(stale_timeout=30)
+        cache.set('a', 1, 60)
+        self.now += 59
+        self.assertEqual(cache.lookup('a'), (1, True))
+        self.now += 2
+        self.assertEqual(cache.lookup('a'), (1, False))
+        self.assertIsNone(cache.get('a'))
+        self.now += 30
+        self.assertEqual(cache.lookup('a'), (None, False))
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['stale_hits'], stats['expirations'], stats['entries']), (1, 2, 1, 0))
+
+    def test_sweep_drops_only_entries_past_their_stale_window(self):
+        cache = ResponseCache(stale_timeout=10)
+        cache.set('short', 1, 5)
+        cache.set('long', 2, 60)
+        self.now += 20
+        self.assertEqual(cache.sweep(), 1)
+        self.assertEqual(cache.lookup('long'), (2, True))
+        self.assertEqual(cache.stats()['entries'], 1)
+
+
+class SingleFlightTests(unittest.TestCase):
+    def run_concurrently(self, flight, fn, callers=5):
+        results = []
+
+        def call():
+            try:
+                results.append(flight.do('key', fn))
+            except Exception as e:
+                results.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        return threads, results
+
+    def test_concurrent_callers_share_one_call(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            release.wait(5)
+            return 'data'
+
+        threads, results = self.run_concurrently(flight, fetch)
+        deadline = time.time() + 5
+        while flight.stats()['shared'] < 4 and time.time() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['data'] * 5)
+        self.assertEqual(flight.stats(), {'in_flight': 0, 'calls': 1, 'shared': 4})
+
+    def test_error_reaches_every_waiting_caller(self):
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def fetch():
+            release.wait(5)
+            raise ValueError('upstream down')
+
+        threads, results = self.run_concurrently(flight, fetch, callers=3)
+        deadline = time.time() + 5
+        while flight.stats()['shared'] < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([str(e) for e in results], ['upstream down'] * 3)
+        # A failed call is not remembered
+        self.assertEqual(flight.do('key', lambda: 'retried'), 'retried')
+
+
+class AsyncSingleFlightTests(unittest.TestCase):
+    def test_concurrent_callers_share_one_call(self):
+        flight = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return 'data'
+
+        async def main():
+            return await asyncio.gather(*(flight.do('key', fetch) for _ in range(5)))
+
+        self.assertEqual(asyncio.run(main()), ['data'] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(flight.stats(), {'in_flight': 0, 'calls': 1, 'shared': 4})
+
+    def test_cancelled_caller_does_not_cancel_the_shared_call(self):
+        flight = AsyncSingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return 'data'
+
+        async def main():
+            first = asyncio.ensure_future(flight.do('key', fetch))
+            second = asyncio.ensure_future(flight.do('key', fetch))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(main()), 'data')
+
+    def test_background_call_is_not_started_twice(self):
+        flight = AsyncSingleFlight()
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+
+        async def main():
+            started = [flight.do_in_background('key', fetch) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            return started
+
+        self.assertEqual(asyncio.run(main()), [True, False, False])
+        self.assertEqual(flight.stats()['calls'], 1)
+
+
+class UserCacheKeyTests(unittest.TestCase):
+    SECRET = 'django-secret-key-at-least-32-bytes-long'
+
+    def setUp(self):
+        patcher = mock.patch.object(auth, 'JWT_SECRET', self.SECRET)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def header(self, secret=None, **claims):
+        payload = {'token_type': 'access', 'user_id': 7, 'exp': int(time.time()) + 300, **claims}
+        return 'Bearer ' + jwt.encode(payload, secret or self.SECRET, algorithm='HS256')
+
+    def test_keyed_by_user_id(self):
+        self.assertEqual(user_cache_key('stats', self.header()), 'stats:user:7')
+        # A refreshed token of the same user hits the same entry
+        self.assertEqual(user_cache_key('stats', self.header(jti='other')), 'stats:user:7')
+
+    def test_unverified_tokens_fall_back_to_the_header(self):
+        for authorization in (
+            self.header(secret='forged-secret-at-least-32-bytes-long'),
+            self.header(exp=int(time.time()) - 10),
+            self.header(token_type='refresh'),
+            'Basic dXNlcjpwYXNz',
+            'Bearer not-a-jwt',
+        ):
+            self.assertEqual(user_cache_key('stats', authorization), f'stats:{authorization}')
+        self.assertEqual(user_cache_key('stats', None), 'stats:')
+
+    def test_without_secret_tokens_are_not_trusted(self):
+        authorization = self.header()
+        with mock.patch.object(auth, 'JWT_SECRET', ''):
+            self.assertEqual(user_cache_key('stats', authorization), f'stats:{authorization}')
+
+
+class MergeCatalogTests(unittest.TestCase):
+    def test_progress_is_filled_in_per_course(self):
+        tree = [
+            {'id': 1, 'name': 'Science', 'courses': [{'id': 10, 'title': 'Physics'}, {'id': 11, 'title': 'Biology'}]},
+            {'id': 2, 'name': 'Empty', 'courses': []},
+        ]
+        # Progress comes from JSON, so its course ids are strings
+        progress = {'10': {'progress': 50, 'is_course_started': True, 'is_course_completed': False}}
+        catalog = merge_catalog(tree, progress)
+        self.assertEqual(catalog[0]['courses'][0], {'id': 10, 'title': 'Physics', **progress['10']})
+        self.assertEqual(catalog[0]['courses'][1], {'id': 11, 'title': 'Biology', **NOT_STARTED})
+        self.assertEqual(catalog[1], {'id': 2, 'name': 'Empty', 'courses': []})
+        # The shared tree is not modified
+        self.assertEqual(tree[0]['courses'][0], {'id': 10, 'title': 'Physics'})
+
+
+if __name__ == '__main__':
+    unittest.main()